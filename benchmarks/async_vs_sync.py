@@ -0,0 +1,32 @@
+"""Compara o engine síncrono (threadpool) com o assíncrono sob concorrência.
+
+Requer um Postgres acessível em DATABASE_URL com as migrações aplicadas:
+
+    python -m benchmarks.async_vs_sync --concurrency 100 --duration 15
+"""
+
+import argparse
+
+from benchmarks.load import print_table, run_load, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default='/books/?limit=20')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, flag in (('sync', 'false'), ('async', 'true')):
+        with serve(args.port, env={'DATABASE_ASYNC': flag}) as url:
+            results[mode] = run_load(
+                url, args.path, args.concurrency, args.duration
+            )
+
+    print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Compara bytes economizados e CPU gasto por codificação e nível.
+
+Comprime páginas JSON de listagem geradas em memória (as mesmas do
+benchmark de serialização), sem banco nem servidor:
+
+    python -m benchmarks.compression --rows 1000 --repeat 50
+"""
+
+import argparse
+import time
+
+from benchmarks.serialization import fast, make_pages
+from madr.compression import available_encoders
+
+LEVELS = {'gzip': [1, 6, 9], 'br': [1, 4, 11], 'zstd': [1, 3, 19]}
+
+
+def cpu_ms(encoder, level, body, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        compressor = encoder(level)
+        compressed = compressor.compress(body) + compressor.finish()
+
+    return (time.process_time() - start) / repeat * 1000, len(compressed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    encoders = available_encoders()
+    print(
+        f'{"página":<14}{"codificação":<14}{"bytes":>10}'
+        f'{"economia":>10}{"CPU ms":>9}'
+    )
+    for name, page in make_pages(args.rows).items():
+        body = fast(*page)
+        print(f'{name:<14}{"identity":<14}{len(body):>10}{"-":>10}{"-":>9}')
+        for encoding, encoder in encoders.items():
+            for level in LEVELS[encoding]:
+                ms, size = cpu_ms(encoder, level, body, args.repeat)
+                saved = 1 - size / len(body)
+                print(
+                    f'{"":<14}{f"{encoding}:{level}":<14}{size:>10}'
+                    f'{saved:>10.1%}{ms:>9.2f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
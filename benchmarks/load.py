@@ -0,0 +1,86 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+
+
+@contextmanager
+def serve(port: int, env: dict | None = None, args: list | None = None):
+    """Sobe a aplicação com uvicorn em um subprocesso e espera ficar pronta."""
+    command = args or [
+        sys.executable, '-m', 'uvicorn', 'madr.app:app',
+        '--port', str(port), '--log-level', 'warning',
+    ]  # fmt: skip
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})})
+
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(f'http://127.0.0.1:{port}/docs')
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def _worker(client, path, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:  # noqa: PLR2004
+            errors.append(response.status_code)
+
+
+async def _load(base_url, path, concurrency, duration, headers):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=60
+    ) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(
+                _worker(client, path, deadline, latencies, errors)
+                for _ in range(concurrency)
+            )
+        )
+
+    return latencies, errors
+
+
+def run_load(
+    base_url, path, concurrency=50, duration=10.0, headers=None
+) -> dict:
+    latencies, errors = asyncio.run(
+        _load(base_url, path, concurrency, duration, headers or {})
+    )
+    latencies.sort()
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / duration,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def print_table(rows: dict):
+    print(f'{"modo":<12}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"erros":>8}')
+    for name, r in rows.items():
+        print(
+            f'{name:<12}{r["rps"]:>10.1f}{r["p50_ms"]:>10.1f}'
+            f'{r["p99_ms"]:>10.1f}{r["errors"]:>8}'
+        )
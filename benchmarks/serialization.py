@@ -0,0 +1,97 @@
+"""Mede o CPU gasto para serializar uma página de listagem.
+
+Compara o caminho padrão (validação `from_attributes` no `response_model`,
+`model_dump` e `json.dumps` do JSONResponse) com o caminho rápido de
+FAST_JSON_ENABLED, que lê os atributos dos objetos ORM e serializa direto.
+Não precisa de banco; os objetos ORM são criados em memória:
+
+    python -m benchmarks.serialization --rows 1000 --repeat 200
+"""
+
+import argparse
+import time
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from madr.models import Author, Book, User
+from madr.schemas import (
+    AuthorList,
+    AuthorSchema,
+    BookList,
+    BookListWithAuthor,
+    BookSchema,
+    BookWithAuthor,
+    UserList,
+    UserPublic,
+)
+from madr.serialization import FastJSONResponse, dump_rows, orjson
+
+
+def make_pages(rows):
+    authors = [Author(name=f'autor {i}') for i in range(rows)]
+    books = []
+    users = []
+    for i, author in enumerate(authors):
+        author.id = i
+        book = Book(year=1900 + i % 125, title=f'livro {i}', author_id=i)
+        book.id = i
+        book.author = author
+        books.append(book)
+        user = User(
+            username=f'user{i}', password='x', email=f'user{i}@madr.com'
+        )
+        user.id = i
+        users.append(user)
+
+    return {
+        'books': ('books', books, BookList, BookSchema),
+        'books+author': ('books', books, BookListWithAuthor, BookWithAuthor),
+        'authors': ('authors', authors, AuthorList, AuthorSchema),
+        'users': ('users', users, UserList, UserPublic),
+    }
+
+
+def validated(key, rows, page_schema, row_schema):
+    # O que o FastAPI faz com o retorno da rota e o response_model
+    adapter = TypeAdapter(page_schema)
+    page = {key: rows, 'next_cursor': None, 'total': None}
+    value = adapter.validate_python(page, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode='json')).body
+
+
+def fast(key, rows, page_schema, row_schema):
+    page = {
+        key: dump_rows(row_schema, rows),
+        'next_cursor': None,
+        'total': None,
+    }
+    return FastJSONResponse(page).body
+
+
+def cpu_ms(function, args, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        function(*args)
+
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'serializador: {"orjson" if orjson else "pydantic-core"}')
+    print(f'{"página":<14}{"padrão ms":>12}{"rápido ms":>12}{"ganho":>8}')
+    for name, page in make_pages(args.rows).items():
+        before = cpu_ms(validated, page, args.repeat)
+        after = cpu_ms(fast, page, args.repeat)
+        print(
+            f'{name:<14}{before:>12.2f}{after:>12.2f}{before / after:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compara o entrypoint antigo (`fastapi run`) com `python -m madr.serve`.
+
+Requer um Postgres acessível em DATABASE_URL com as migrações aplicadas
+e, com mais de um worker, um Redis em CACHE_REDIS_URL:
+
+    python -m benchmarks.serve --concurrency 100 --duration 15 --workers 4
+"""
+
+import argparse
+import sys
+
+from benchmarks.load import print_table, run_load, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default='/books/?limit=20')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    commands = {
+        'fastapi run': [
+            'fastapi', 'run', 'madr/app.py', '--port', str(args.port),
+        ],
+        'madr.serve': [
+            sys.executable, '-m', 'madr.serve', '--port', str(args.port),
+            *(['--workers', str(args.workers)] if args.workers else []),
+        ],
+    }  # fmt: skip
+
+    results = {}
+    for name, command in commands.items():
+        with serve(
+            args.port, env={'SERVER_ACCESS_LOG': 'false'}, args=command
+        ) as url:
+            results[name] = run_load(
+                url, args.path, args.concurrency, args.duration
+            )
+
+    print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Mede o filtro `title ILIKE '%x%'` com e sem o índice GIN de trigramas.
+
+Usa o banco de DATABASE_URL com as migrações aplicadas. `--seed` insere
+livros sintéticos até a tabela `books` chegar a `--rows` linhas:
+
+    python -m benchmarks.trigram_search --seed --rows 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine, func, select, text
+
+from madr.models import Author, Book
+from madr.queries import icontains
+from madr.settings import Settings
+
+SEED_SQL = text("""
+    INSERT INTO books (year, title, author_id)
+    SELECT 1900 + g % 125, 'livro ' || md5(g::text), :author_id
+    FROM generate_series(:start, :stop) AS g
+""")
+
+
+def seed(connection, rows):
+    total = connection.scalar(select(func.count()).select_from(Book))
+    if total >= rows:
+        return
+
+    author_id = connection.scalar(
+        text(
+            "INSERT INTO authors (name) VALUES ('benchmark') "
+            'ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name '
+            'RETURNING id'
+        )
+    )
+    connection.execute(
+        SEED_SQL, {'author_id': author_id, 'start': total, 'stop': rows}
+    )
+    connection.execute(text('ANALYZE books'))
+
+
+def timed(connection, statement, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(statement).all()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--term', default='abc1')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(Settings().DATABASE_URL)
+    books = select(Book).where(icontains(Book.title, args.term)).limit(20)
+    authors = select(Author).where(icontains(Author.name, 'bench'))
+
+    with engine.begin() as connection:
+        if args.seed:
+            seed(connection, args.rows)
+
+        results = {}
+        for label, statement in (('books', books), ('authors', authors)):
+            connection.execute(text('SET LOCAL enable_bitmapscan = off'))
+            seq = timed(connection, statement, args.repeat)
+            connection.execute(text('SET LOCAL enable_bitmapscan = on'))
+            gin = timed(connection, statement, args.repeat)
+            results[label] = (seq, gin)
+
+    print(f'{"tabela":<10}{"seq scan ms":>14}{"gin ms":>10}{"ganho":>8}')
+    for label, (seq, gin) in results.items():
+        print(f'{label:<10}{seq:>14.1f}{gin:>10.1f}{seq / gin:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
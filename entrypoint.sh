@@ -1,7 +1,7 @@
 #!/bin/sh
 
 # Executa as migrações do banco de dados
-poetry run alembic upgrade head
+alembic upgrade head
 
-# Inicia a aplicação
-poetry run fastapi run madr/app.py --host 0.0.0.0
\ No newline at end of file
+# Inicia a aplicação com vários workers (ver madr/serve.py)
+exec python -m madr.serve
@@ -1,10 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from madr.routers import auth, autores, contas, livros
+from madr.cache import cache_bus
+from madr.compression import CompressionMiddleware, compression_options
+from madr.metrics import MetricsMiddleware, metrics
+from madr.passwords import password_pool
+from madr.response_cache import ResponseCacheMiddleware, response_cache
+from madr.routers import (
+    auth,
+    autores,
+    busca,
+    contas,
+    estatisticas,
+    internal,
+    livros,
+    metricas,
+)
+from madr.serialization import default_response_class
+from madr.settings import Settings
+
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recebe as invalidações publicadas pelos outros workers
+    listener = cache_bus.client and asyncio.create_task(cache_bus.listen())
+    # Com vários workers, cada um publica suas métricas em METRICS_DIR
+    flusher = (
+        metrics.enabled
+        and metrics.directory
+        and asyncio.create_task(metrics.flush_periodically())
+    )
+    yield
+    if listener:
+        listener.cancel()
+    if flusher:
+        flusher.cancel()
+        metrics.write()
+    password_pool.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(
+    lifespan=lifespan, default_response_class=default_response_class()
+)
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+# Depois do cache: as entradas ficam sem compressão e o ETag não muda
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, **compression_options())
+# Por fora de tudo: a latência inclui cache e compressão
+app.add_middleware(MetricsMiddleware, metrics=metrics, routes=app.routes)
 
 app.include_router(auth.router)
 app.include_router(contas.router)
 app.include_router(autores.router)
 app.include_router(livros.router)
+app.include_router(busca.router)
+app.include_router(estatisticas.router)
+app.include_router(internal.router)
+app.include_router(metricas.router)
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import json
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from madr.redis_client import RedisClient, RedisError
+from madr.settings import Settings
+
+settings = Settings()
+
+REDIS_ERRORS = (OSError, asyncio.TimeoutError, EOFError, RedisError)
+
+
+class TTLCache:
+    """Cache LRU em memória com expiração por entrada e contadores."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None, expires_at=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None:
+            deadline = time.time() + ttl
+            expires_at = (
+                deadline if expires_at is None else min(expires_at, deadline)
+            )
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_if(self, predicate):
+        with self._lock:
+            keys = [k for k, (v, _) in self._data.items() if predicate(v)]
+            for key in keys:
+                del self._data[key]
+
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+
+def _expiry_ms(ttl: float | None, expires_at: float | None):
+    deadlines = [
+        seconds
+        for seconds in (
+            ttl,
+            None if expires_at is None else expires_at - time.time(),
+        )
+        if seconds is not None
+    ]
+    return max(1, int(min(deadlines) * 1000)) if deadlines else None
+
+
+class MemoryCache:
+    """Backend local ao processo: TTLCache com tags e contadores."""
+
+    backend = 'memory'
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counters = Counter()
+
+    @property
+    def hits(self):
+        return self.entries.hits
+
+    @property
+    def misses(self):
+        return self.entries.misses
+
+    async def get(self, key):
+        item = self.entries.get(key)
+        return None if item is None else item[0]
+
+    async def set(self, key, value, ttl=None, expires_at=None, tags=()):
+        self.entries.set(key, (value, set(tags)), ttl, expires_at)
+
+    async def delete(self, key):
+        self.entries.delete(key)
+
+    async def invalidate(self, tag: str):
+        return self.entries.discard_if(lambda item: tag in item[1])
+
+    async def incr(self, key):
+        self.counters[key] += 1
+        return self.counters[key]
+
+    async def get_many(self, keys):
+        return [self.counters[key] for key in keys]
+
+    async def clear(self):
+        self.entries.clear()
+        self.counters.clear()
+
+    def stats(self):
+        return {'backend': self.backend, **self.entries.stats()}
+
+
+class RedisCache:
+    """Backend compartilhado entre processos, em um servidor Redis.
+
+    Os valores são serializados com pickle: o servidor precisa ser
+    confiável. Falhas de rede contam como miss em vez de derrubar a rota.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, namespace: str, ttl: float | None = None):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=20)
+        return f'madr:{self.namespace}:{digest.hexdigest()}'
+
+    def _tag(self, tag: str):
+        return f'madr:{self.namespace}:tag:{tag}'
+
+    def _counter(self, key: str):
+        return f'madr:{self.namespace}:counter:{key}'
+
+    async def _execute(self, *args, default=None):
+        try:
+            return await self.client.execute(*args)
+        except REDIS_ERRORS:
+            self.errors += 1
+            return default
+
+    async def get(self, key):
+        raw = await self._execute('GET', self._key(key))
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pickle.loads(raw)
+
+    async def set(self, key, value, ttl=None, expires_at=None, tags=()):
+        key = self._key(key)
+        expiry = _expiry_ms(self.ttl if ttl is None else ttl, expires_at)
+        command = ['SET', key, pickle.dumps(value)]
+        if expiry is not None:
+            command += ['PX', expiry]
+
+        commands = [command]
+        for tag in tags:
+            commands.append(['SADD', self._tag(tag), key])
+            # O conjunto da tag vive pelo menos tanto quanto cada chave dele:
+            # NX dá a validade a um conjunto novo e GT só a estende
+            if expiry is None:
+                commands.append(['PERSIST', self._tag(tag)])
+            else:
+                commands.extend((
+                    ['PEXPIRE', self._tag(tag), expiry, 'NX'],
+                    ['PEXPIRE', self._tag(tag), expiry, 'GT'],
+                ))
+
+        try:
+            await self.client.transaction(*commands)
+        except REDIS_ERRORS:
+            self.errors += 1
+
+    async def delete(self, key):
+        await self._execute('DEL', self._key(key))
+
+    async def invalidate(self, tag: str):
+        keys = await self._execute('SMEMBERS', self._tag(tag), default=[])
+        await self._execute('DEL', self._tag(tag), *keys)
+        return len(keys)
+
+    async def incr(self, key):
+        return await self._execute('INCR', self._counter(key))
+
+    async def get_many(self, keys):
+        counters = [self._counter(key) for key in keys]
+        values = await self._execute('MGET', *counters)
+        if values is None:
+            return None
+
+        return [int(value or 0) for value in values]
+
+    async def clear(self):
+        cursor = '0'
+        while True:
+            reply = await self._execute(
+                'SCAN', cursor, 'MATCH', f'madr:{self.namespace}:*'
+            )
+            if reply is None:
+                break
+
+            cursor, keys = reply[0].decode(), reply[1]
+            if keys:
+                await self._execute('DEL', *keys)
+            if cursor == '0':
+                break
+
+        self.hits = self.misses = self.errors = 0
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+        }
+
+
+class InvalidationBus:
+    """Aplica invalidações localmente e as repassa aos demais processos.
+
+    Só publica quando os caches são locais (backend `memory`) e há um
+    servidor Redis configurado; com o backend `redis` os dados já são
+    compartilhados e a invalidação local basta.
+    """
+
+    def __init__(self, client=None, channel: str = 'madr:invalidate'):
+        self.client = client
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+        self._handlers = {}
+
+    def register(self, name: str, handler):
+        self._handlers[name] = handler
+
+    async def publish(self, name: str, *args):
+        await self._handlers[name](*args)
+
+        if self.client is None:
+            return
+
+        message = json.dumps([self.origin, name, args])
+        try:
+            await self.client.execute('PUBLISH', self.channel, message)
+            self.published += 1
+        except REDIS_ERRORS:
+            pass
+
+    async def handle(self, message):
+        origin, name, args = json.loads(message)
+        if origin != self.origin and name in self._handlers:
+            self.received += 1
+            await self._handlers[name](*args)
+
+    async def listen(self, retry_seconds: float = 1.0):
+        while True:
+            try:
+                async for message in self.client.subscribe(self.channel):
+                    await self.handle(message)
+            except REDIS_ERRORS:
+                await asyncio.sleep(retry_seconds)
+
+
+redis_client = (
+    RedisClient(
+        settings.CACHE_REDIS_URL,
+        pool_size=settings.CACHE_REDIS_POOL_SIZE,
+        timeout=settings.CACHE_REDIS_TIMEOUT_SECONDS,
+    )
+    if settings.CACHE_REDIS_URL
+    else None
+)
+cache_bus = InvalidationBus(
+    redis_client if settings.CACHE_BACKEND == 'memory' else None
+)
+
+
+def make_cache(namespace: str, maxsize: int, ttl: float | None = None):
+    if settings.CACHE_BACKEND == 'redis':
+        if redis_client is None:
+            raise RuntimeError('CACHE_BACKEND=redis requires CACHE_REDIS_URL')
+
+        return RedisCache(redis_client, namespace, ttl)
+
+    return MemoryCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,217 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from madr.settings import Settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+settings = Settings()
+
+
+class _Gzip:
+    def __init__(self, level: int = 6):
+        # wbits 16 + 15: cabeçalho e trailer gzip
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int = 4):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int = 3):
+        compressor = zstandard.ZstdCompressor(level=level)
+        self._compressor = compressor.compressobj()
+
+    def compress(self, data: bytes):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_encoders():
+    encoders = {'gzip': _Gzip}
+    if brotli is not None:
+        encoders['br'] = _Brotli
+    if zstandard is not None:
+        encoders['zstd'] = _Zstd
+
+    return encoders
+
+
+def negotiate(accept_encoding: str, preference: list[str]):
+    """Escolhe a primeira codificação de `preference` aceita pelo cliente."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    for coding in preference:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+
+    return None
+
+
+class CompressionMiddleware:
+    """Comprime respostas com gzip (ou br/zstd, se instalados).
+
+    Respostas completas abaixo de `minimum_size` bytes saem sem compressão.
+    Respostas em streaming são comprimidas pedaço a pedaço, com flush a
+    cada pedaço, sem acumular o corpo inteiro.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        encodings: tuple[str, ...] | list[str] = ('gzip',),
+        levels: dict[str, int] | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels or {}
+        encoders = available_encoders()
+        self.encoders = {
+            name: encoders[name] for name in encodings if name in encoders
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate(
+            Headers(scope=scope).get('accept-encoding', ''),
+            list(self.encoders),
+        )
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        responder = _Responder(self, encoding, send)
+        await self.app(scope, receive, responder)
+
+
+class _Responder:
+    def __init__(self, middleware, encoding, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _new_encoder(self):
+        encoder = self.middleware.encoders[self.encoding]
+        if self.encoding in self.middleware.levels:
+            return encoder(self.middleware.levels[self.encoding])
+
+        return encoder()
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            headers = Headers(raw=message.get('headers', []))
+            self.passthrough = 'content-encoding' in headers
+            return None
+
+        if message['type'] != 'http.response.body':
+            return await self.send(message)
+
+        if self.passthrough:
+            if self.start:
+                await self.send(self.start)
+                self.start = None
+            return await self.send(message)
+
+        if self.start is not None:
+            return await self._first(message)
+
+        return await self._next(message)
+
+    async def _first(self, message):
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=list(start.get('headers', [])))
+        headers.add_vary_header('Accept-Encoding')
+
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self.send({**start, 'headers': headers.raw})
+            return await self.send(message)
+
+        self.encoder = self._new_encoder()
+        headers['content-encoding'] = self.encoding
+
+        if more_body:
+            # Streaming: o tamanho final não é conhecido
+            del headers['content-length']
+            body = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            body = self.encoder.compress(body) + self.encoder.finish()
+            headers['content-length'] = str(len(body))
+
+        await self.send({**start, 'headers': headers.raw})
+        await self.send({**message, 'body': body})
+
+    async def _next(self, message):
+        if self.encoder is None:
+            return await self.send(message)
+
+        body = self.encoder.compress(message.get('body', b''))
+        if message.get('more_body', False):
+            body += self.encoder.flush()
+        else:
+            body += self.encoder.finish()
+
+        await self.send({**message, 'body': body})
+
+
+def compression_options():
+    return {
+        'minimum_size': settings.COMPRESSION_MIN_SIZE,
+        'encodings': settings.COMPRESSION_ENCODINGS,
+        'levels': {
+            'gzip': settings.COMPRESSION_GZIP_LEVEL,
+            'br': settings.COMPRESSION_BROTLI_QUALITY,
+            'zstd': settings.COMPRESSION_ZSTD_LEVEL,
+        },
+    }
@@ -1,11 +1,222 @@
-from sqlalchemy import create_engine
+import itertools
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session
 
+from madr.metrics import metrics
+from madr.pool import PoolStats, TimedAsyncQueuePool, TimedQueuePool
 from madr.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+settings = Settings()
+
+
+def pool_options(poolclass):
+    return {
+        'poolclass': poolclass,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def _create_engine(url):
+    if settings.DATABASE_ASYNC:
+        return create_async_engine(url, **pool_options(TimedAsyncQueuePool))
+
+    return create_engine(url, **pool_options(TimedQueuePool))
+
+
+def _sync_engine(bind):
+    return bind.sync_engine if isinstance(bind, AsyncEngine) else bind
+
+
+engine = create_engine(settings.DATABASE_URL, **pool_options(TimedQueuePool))
+async_engine = (
+    _create_engine(settings.DATABASE_URL) if settings.DATABASE_ASYNC else None
+)
+replica_engines = [
+    _create_engine(url) for url in settings.DATABASE_REPLICA_URLS
+]
+_next_replica = itertools.count()
+
+pool_stats = {'primary': PoolStats(_sync_engine(async_engine or engine))}
+for index, replica in enumerate(replica_engines):
+    pool_stats[f'replica_{index}'] = PoolStats(_sync_engine(replica))
+
+metrics.register(
+    lambda: [
+        item
+        for name, stats in pool_stats.items()
+        for item in stats.families(name)
+    ]
+)
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['written'] = True
+
+
+def _in_threadpool(name):
+    async def method(self, *args, **kwargs):
+        return await run_in_threadpool(
+            getattr(self.sync_session, name), *args, **kwargs
+        )
+
+    method.__name__ = name
+    return method
+
+
+class ThreadedSession:
+    """Session síncrona com a mesma interface awaitable da AsyncSession.
+
+    Cada operação de I/O roda no threadpool, então as rotas `async def`
+    funcionam igual com o engine síncrono ou com o assíncrono.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    scalar = _in_threadpool('scalar')
+    scalars = _in_threadpool('scalars')
+    execute = _in_threadpool('execute')
+    get = _in_threadpool('get')
+    merge = _in_threadpool('merge')
+    delete = _in_threadpool('delete')
+    flush = _in_threadpool('flush')
+    commit = _in_threadpool('commit')
+    rollback = _in_threadpool('rollback')
+    refresh = _in_threadpool('refresh')
+    connection = _in_threadpool('connection')
+    close = _in_threadpool('close')
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        statement = statement.execution_options(stream_results=True)
+        result = await self.execute(statement, *args, **kwargs)
+        return ThreadedResult(result)
+
+
+class ThreadedResult:
+    """Lê um Result com cursor no servidor em partições, no threadpool."""
+
+    def __init__(self, result):
+        self.result = result
 
+    async def partitions(self, size: int | None = None):
+        partitions = self.result.partitions(size)
+        while partition := await run_in_threadpool(next, partitions, None):
+            yield partition
 
-def get_session():
-    with Session(engine) as session:
+
+class RoutingSession:
+    """Sessão somente leitura que consulta uma réplica.
+
+    Depois que a sessão primária da mesma requisição escreve algo, as
+    leituras seguintes voltam para a primária.
+    """
+
+    def __init__(self, primary, replica):
+        self.primary = primary
+        self.replica = replica
+
+    @property
+    def target(self):
+        if self.primary.sync_session.info.get('written'):
+            return self.primary
+
+        return self.replica
+
+    async def scalar(self, *args, **kwargs):
+        return await self.target.scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await self.target.scalars(*args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await self.target.execute(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await self.target.get(*args, **kwargs)
+
+    async def run_sync(self, *args, **kwargs):
+        return await self.target.run_sync(*args, **kwargs)
+
+
+def _copy_rows(session, statement, rows):
+    driver_connection = session.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor, cursor.copy(statement) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+async def copy_rows(session, statement: str, rows):
+    """Executa `COPY ... FROM STDIN` na conexão e transação da sessão."""
+    if not isinstance(session, AsyncSession):
+        return await session.run_sync(_copy_rows, statement, rows)
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(statement) as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+def open_session(bind):
+    if isinstance(bind, AsyncEngine):
+        return AsyncSession(bind, expire_on_commit=False)
+
+    return ThreadedSession(Session(bind, expire_on_commit=False))
+
+
+async def get_session():
+    session = open_session(async_engine or engine)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def _read_bind():
+    if not replica_engines:
+        return async_engine or engine
+
+    return replica_engines[next(_next_replica) % len(replica_engines)]
+
+
+def get_read_session_factory():
+    # Para respostas em streaming: o corpo é gerado depois que as
+    # dependências com yield já fecharam suas sessões
+    bind = _read_bind()
+    return lambda: open_session(bind)
+
+
+async def get_read_session(session=Depends(get_session)):
+    if not replica_engines:
         yield session
+        return
+
+    bind = _read_bind()
+    replica = open_session(bind)
+    try:
+        yield RoutingSession(session, replica)
+    finally:
+        await replica.close()
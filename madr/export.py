@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+
+from madr.settings import Settings
+
+settings = Settings()
+
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+async def _export_rows(session_factory, statement, columns, fmt):
+    session = session_factory()
+    try:
+        if fmt == 'csv':
+            yield _csv_line(columns)
+
+        # Cursor no servidor: no máximo EXPORT_BATCH_SIZE linhas em memória
+        result = await session.stream(statement)
+        async for rows in result.partitions(settings.EXPORT_BATCH_SIZE):
+            if fmt == 'csv':
+                chunk = [_csv_line(row) for row in rows]
+            else:
+                chunk = [
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False)
+                    + '\n'
+                    for row in rows
+                ]
+            yield ''.join(chunk)
+    finally:
+        await session.close()
+
+
+def export_response(session_factory, statement, fmt: ExportFormat, name):
+    columns = [column.key for column in statement.selected_columns]
+
+    return StreamingResponse(
+        _export_rows(session_factory, statement, columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{name}.{fmt}"'
+        },
+    )
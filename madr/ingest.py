@@ -0,0 +1,267 @@
+import csv
+import json
+import tempfile
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from madr.database import copy_rows
+from madr.models import Author
+from madr.schemas import AuthorSchema, BulkBookRow
+from madr.settings import Settings
+
+settings = Settings()
+
+SPOOL_MAX_SIZE = 1024 * 1024
+
+AUTHORS_STAGING = text("""
+    CREATE TEMP TABLE authors_staging (line int, name text) ON COMMIT DROP
+""")
+AUTHORS_COPY = 'COPY authors_staging (line, name) FROM STDIN'
+AUTHORS_MERGE = text("""
+    WITH candidates AS (
+        SELECT line, name,
+            row_number() OVER (PARTITION BY name ORDER BY line) = 1 AS first
+        FROM authors_staging
+    ), inserted AS (
+        INSERT INTO authors (name)
+        SELECT name FROM candidates WHERE first
+        ON CONFLICT (name) DO NOTHING
+        RETURNING name
+    )
+    SELECT c.line FROM candidates c
+    LEFT JOIN inserted i ON c.first AND i.name = c.name
+    WHERE i.name IS NULL
+    ORDER BY c.line
+""")
+
+BOOKS_STAGING = text("""
+    CREATE TEMP TABLE books_staging (
+        line int, title text, year int, author_id int
+    ) ON COMMIT DROP
+""")
+BOOKS_COPY = 'COPY books_staging (line, title, year, author_id) FROM STDIN'
+BOOKS_MERGE = text("""
+    WITH candidates AS (
+        SELECT s.line, s.title, s.year, s.author_id,
+            a.id IS NOT NULL AS has_author,
+            a.id IS NOT NULL AND row_number() OVER (
+                PARTITION BY s.title, a.id IS NOT NULL ORDER BY s.line
+            ) = 1 AS first
+        FROM books_staging s
+        LEFT JOIN authors a ON a.id = s.author_id
+    ), inserted AS (
+        INSERT INTO books (title, year, author_id)
+        SELECT title, year, author_id FROM candidates WHERE first
+        ON CONFLICT (title) DO NOTHING
+        RETURNING title
+    )
+    SELECT c.line, c.has_author FROM candidates c
+    LEFT JOIN inserted i ON c.first AND i.title = c.title
+    WHERE i.title IS NULL
+    ORDER BY c.line
+""")
+
+
+class IngestReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, detail: str):
+        self.failed += 1
+        # O relatório guarda no máximo BULK_MAX_ERRORS linhas
+        if len(self.errors) < settings.BULK_MAX_ERRORS:
+            self.errors.append({'line': line, 'detail': detail})
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+        }
+
+
+async def spool_body(request):
+    # Mantém até SPOOL_MAX_SIZE em memória; acima disso vai para o disco
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    async for chunk in request.stream():
+        spool.write(chunk)
+
+    spool.seek(0)
+    return spool
+
+
+class InvalidRow(ValueError):
+    """Linha que não pôde ser lida; vira um erro no relatório."""
+
+
+def _decode_lines(spool):
+    # Decodifica linha a linha: um byte inválido invalida só a sua linha
+    for number, raw in enumerate(spool, start=1):
+        try:
+            yield number, raw.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            yield number, InvalidRow('Invalid encoding, expected UTF-8')
+
+
+def _read_csv(spool):
+    invalid = []
+
+    def lines():
+        for number, line in _decode_lines(spool):
+            if isinstance(line, InvalidRow):
+                # Linha vazia: o leitor pula, mas continua contando a linha
+                invalid.append((number, line))
+                yield '\n'
+            else:
+                yield line
+
+    reader = csv.DictReader(lines())
+    for row in reader:
+        yield from invalid
+        invalid.clear()
+
+        # Colunas a mais ficam na chave None do DictReader
+        if None in row:
+            yield reader.line_num, InvalidRow('Too many columns')
+            continue
+
+        yield reader.line_num, {k: v for k, v in row.items() if v}
+
+    yield from invalid
+
+
+def read_rows(spool, content_type: str):
+    """Gera (linha, dados) de um corpo NDJSON ou CSV, uma linha por vez."""
+    if 'csv' in content_type:
+        yield from _read_csv(spool)
+        return
+
+    for number, line in _decode_lines(spool):
+        if isinstance(line, InvalidRow):
+            yield number, line
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def batched(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def validate(model, line: int, data, report: IngestReport):
+    if isinstance(data, InvalidRow):
+        report.error(line, str(data))
+        return None
+
+    if not isinstance(data, dict):
+        report.error(line, 'Invalid row')
+        return None
+
+    try:
+        return model.model_validate(data)
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        location = '.'.join(str(part) for part in error['loc'])
+        detail = f'{location}: {error["msg"]}' if location else error['msg']
+        report.error(line, detail)
+        return None
+
+
+async def resolve_authors(session, names):
+    names = sorted(names)
+    await session.execute(
+        insert(Author)
+        .values([{'name': name} for name in names])
+        .on_conflict_do_nothing(index_elements=['name'])
+    )
+    rows = await session.execute(
+        select(Author.name, Author.id).where(Author.name.in_(names))
+    )
+
+    return dict(rows.all())
+
+
+async def ingest_authors(session, rows):
+    report = IngestReport()
+    await session.execute(AUTHORS_STAGING)
+
+    for batch in batched(rows, settings.BULK_BATCH_SIZE):
+        valid = []
+        for line, data in batch:
+            author = validate(AuthorSchema, line, data, report)
+            if author:
+                valid.append((line, author.name))
+
+        if not valid:
+            continue
+
+        await copy_rows(session, AUTHORS_COPY, valid)
+        rejected = (await session.scalars(AUTHORS_MERGE)).all()
+        for line in rejected:
+            report.error(line, 'Author is already included in MADR!')
+
+        report.inserted += len(valid) - len(rejected)
+        await session.execute(text('TRUNCATE authors_staging'))
+
+    await session.commit()
+
+    return report
+
+
+async def ingest_books(session, rows):
+    report = IngestReport()
+    await session.execute(BOOKS_STAGING)
+
+    for batch in batched(rows, settings.BULK_BATCH_SIZE):
+        valid = []
+        for line, data in batch:
+            book = validate(BulkBookRow, line, data, report)
+            if book:
+                if book.author_id is None:
+                    book.author = AuthorSchema(name=book.author).name
+                valid.append((line, book))
+
+        if not valid:
+            continue
+
+        names = {book.author for _, book in valid if book.author_id is None}
+        authors = await resolve_authors(session, names) if names else {}
+
+        await copy_rows(
+            session,
+            BOOKS_COPY,
+            [
+                (line, book.title, book.year, book.author_id)
+                if book.author_id is not None
+                else (line, book.title, book.year, authors[book.author])
+                for line, book in valid
+            ],
+        )
+        rejected = (await session.execute(BOOKS_MERGE)).all()
+        for line, has_author in rejected:
+            report.error(
+                line,
+                'Book is already included in MADR!'
+                if has_author
+                else 'Author does not exist',
+            )
+
+        report.inserted += len(valid) - len(rejected)
+        await session.execute(text('TRUNCATE books_staging'))
+
+    await session.commit()
+
+    return report
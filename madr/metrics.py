@@ -0,0 +1,358 @@
+import asyncio
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from starlette.routing import Match
+
+from madr.settings import Settings
+
+settings = Settings()
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+STALE_FLUSHES = 3
+
+
+class Histogram:
+    """Histograma com buckets fixos, no formato do Prometheus.
+
+    Sem lock: quem atualiza de mais de uma thread protege a chamada.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # Um bucket por faixa; o acumulado (le=) é calculado ao exportar
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def sample(self):
+        return {'counts': list(self.counts), 'sum': self.sum}
+
+
+def family(name, kind, help, samples, buckets=None):
+    """Uma métrica e suas amostras, como [(labels, valor), ...]."""
+    return {
+        'name': name,
+        'type': kind,
+        'help': help,
+        'buckets': buckets,
+        'samples': [[labels, value] for labels, value in samples],
+    }
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(labels: dict):
+    if not labels:
+        return ''
+
+    pairs = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f'{{{pairs}}}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def merge(snapshots):
+    """Soma as amostras de vários processos, por nome e labels."""
+    merged = {}
+    for families in snapshots:
+        for item in families:
+            target = merged.setdefault(item['name'], {**item, 'samples': {}})
+            for labels, value in item['samples']:
+                key = tuple(sorted(labels.items()))
+                current = target['samples'].get(key)
+                if current is None:
+                    target['samples'][key] = value
+                elif item['type'] == 'histogram':
+                    target['samples'][key] = {
+                        'counts': [
+                            a + b
+                            for a, b in zip(current['counts'], value['counts'])
+                        ],
+                        'sum': current['sum'] + value['sum'],
+                    }
+                else:
+                    target['samples'][key] = current + value
+
+    return list(merged.values())
+
+
+def dump(merged):
+    """Volta o resultado de `merge` ao formato dos snapshots."""
+    return [
+        {
+            **item,
+            'samples': [
+                [dict(key), value] for key, value in item['samples'].items()
+            ],
+        }
+        for item in merged
+    ]
+
+
+def render(families) -> str:
+    lines = []
+    for item in families:
+        name = item['name']
+        lines.extend((
+            f'# HELP {name} {item["help"]}',
+            f'# TYPE {name} {item["type"]}',
+        ))
+
+        for key, value in sorted(item['samples'].items()):
+            labels = dict(key)
+            if item['type'] != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+
+            cumulative = 0
+            bounds = [*item['buckets'], float('inf')]
+            for bound, count in zip(bounds, value['counts']):
+                cumulative += count
+                bucket = _labels({**labels, 'le': _number(bound)})
+                lines.append(f'{name}_bucket{bucket} {cumulative}')
+            lines.extend((
+                f'{name}_sum{_labels(labels)} {_number(value["sum"])}',
+                f'{name}_count{_labels(labels)} {cumulative}',
+            ))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class Metrics:
+    """Métricas HTTP do processo e coletores de outros módulos.
+
+    As contagens são atualizadas só no event loop, sem lock. Com vários
+    workers, cada processo grava periodicamente um snapshot em `directory`
+    e o `/metrics` de qualquer worker soma os arquivos de todos. O snapshot
+    de um worker encerrado tem contadores e histogramas somados a um único
+    arquivo agregado e é apagado; os gauges dele são descartados.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        directory: str | None = None,
+        flush_seconds: float = 5.0,
+    ):
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.requests = {}
+        self.in_flight = 0
+        self._collectors = []
+
+    def register(self, collector):
+        """`collector()` devolve uma lista de `family(...)`."""
+        self._collectors.append(collector)
+
+    def observe_request(self, method, route, status, seconds):
+        key = (method, route, str(status))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram()
+        histogram.observe(seconds)
+
+    def collect(self):
+        families = [
+            family(
+                'madr_http_request_duration_seconds',
+                'histogram',
+                'Latência das requisições HTTP, por rota e status.',
+                [
+                    (
+                        {'method': method, 'route': route, 'status': status},
+                        histogram.sample(),
+                    )
+                    for (method, route, status), histogram in list(
+                        self.requests.items()
+                    )
+                ],
+                buckets=LATENCY_BUCKETS,
+            ),
+            family(
+                'madr_http_requests_in_flight',
+                'gauge',
+                'Requisições HTTP em andamento.',
+                [({}, self.in_flight)],
+            ),
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        return families
+
+    def _path(self, pid: int | str):
+        return Path(self.directory) / f'metrics-{pid}.json'
+
+    @staticmethod
+    def _replace(path: Path, families):
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(families))
+        # Troca atômica: quem lê nunca vê um arquivo pela metade
+        temporary.replace(path)
+
+    def write(self):
+        self._replace(self._path(os.getpid()), self.collect())
+
+    @contextmanager
+    def _lock(self):
+        # Um worker por vez: o snapshot de um worker encerrado não pode ser
+        # somado duas vezes, nem lido junto com o agregado que já o contém
+        with (Path(self.directory) / 'metrics.lock').open('a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _retire(self, pid: int):
+        """Soma o snapshot de `pid` ao agregado e apaga o arquivo."""
+        path, retired = self._path(pid), self._path('retired')
+        try:
+            families = json.loads(path.read_text())
+        except FileNotFoundError:
+            return
+        except ValueError:
+            families = []
+
+        try:
+            total = json.loads(retired.read_text())
+        except FileNotFoundError:
+            total = []
+
+        counters = [f for f in families if f['type'] != 'gauge']
+        self._replace(retired, dump(merge([total, counters])))
+        path.unlink()
+
+    def retire(self, pid: int):
+        with self._lock():
+            self._retire(pid)
+
+    def read_others(self):
+        snapshots = []
+        with self._lock():
+            paths = []
+            for path in Path(self.directory).glob('metrics-*.json'):
+                name = path.stem.removeprefix('metrics-')
+                if name in {'retired', str(os.getpid())}:
+                    continue
+                if _alive(int(name)):
+                    paths.append(path)
+                else:
+                    self._retire(int(name))
+
+            for path in [*paths, self._path('retired')]:
+                try:
+                    families = json.loads(path.read_text())
+                    age = time.time() - path.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+
+                # Sem flush recente, o PID pode ter sido reusado por outro
+                # processo: os gauges deixam de valer, os contadores não
+                if age > STALE_FLUSHES * self.flush_seconds:
+                    families = [f for f in families if f['type'] != 'gauge']
+                snapshots.append(families)
+
+        return snapshots
+
+    async def flush_periodically(self):
+        # Um arquivo com o PID deste processo é de um worker antigo que
+        # tinha o mesmo PID: não pode ser confundido com este
+        await asyncio.to_thread(self.retire, os.getpid())
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            self.write()
+
+    async def exposition(self) -> str:
+        snapshots = [self.collect()]
+        if self.directory:
+            snapshots.extend(await asyncio.to_thread(self.read_others))
+
+        return render(merge(snapshots))
+
+
+class MetricsMiddleware:
+    """Mede cada requisição HTTP pelo template da rota (ex.: /books/{id})."""
+
+    def __init__(self, app, metrics: Metrics, routes=()):
+        self.app = app
+        self.metrics = metrics
+        self.routes = routes
+
+    def _route(self, scope):
+        route = scope.get('route')
+        if route is not None:
+            return route.path
+
+        # Respostas que não chegaram ao router (ex.: cache de respostas)
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.metrics.enabled:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe_request(
+                scope['method'],
+                self._route(scope),
+                status,
+                time.perf_counter() - start,
+            )
+
+
+metrics = Metrics(
+    enabled=settings.METRICS_ENABLED,
+    directory=settings.METRICS_DIR,
+    flush_seconds=settings.METRICS_FLUSH_SECONDS,
+)
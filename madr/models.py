@@ -1,18 +1,24 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, BigInteger, ForeignKey, Index, event, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
+SEARCH_CONFIG = 'simple'
+
 
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    # Defaults do servidor voltam no próprio INSERT/UPDATE via RETURNING
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
-    password: Mapped[str]
+    # Só o login precisa do hash; as demais consultas não o carregam
+    password: Mapped[str] = mapped_column(deferred=True)
     email: Mapped[str] = mapped_column(unique=True)
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -27,6 +33,7 @@ class Author:
     """https://docs.sqlalchemy.org/en/20/orm/basic_relationships.html"""
 
     __tablename__ = 'authors'
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str] = mapped_column(unique=True)
@@ -34,13 +41,26 @@ class Author:
         init=False, server_default=func.now()
     )
     books: Mapped[list['Book']] = relationship(
-        init=False, back_populates='author', cascade='all, delete-orphan'
+        init=False,
+        back_populates='author',
+        order_by='Book.id',
+        cascade='all, delete-orphan',
+        # O banco apaga os livros (ON DELETE CASCADE), sem carregá-los
+        passive_deletes=True,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Book:
     __tablename__ = 'books'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        Index('ix_books_author_id', 'author_id', 'id'),
+        Index('ix_books_year_id', 'year', 'id'),
+        Index(
+            'ix_books_search_vector', 'search_vector', postgresql_using='gin'
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     year: Mapped[int]
@@ -48,5 +68,231 @@ class Book:
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
-    author_id: Mapped[int] = mapped_column(ForeignKey('authors.id'))
+    author_id: Mapped[int] = mapped_column(
+        ForeignKey('authors.id', ondelete='CASCADE')
+    )
     author: Mapped[Author] = relationship(init=False, back_populates='books')
+    # Mantido pelos triggers abaixo: título (peso A) + nome do autor (peso B)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, init=False, deferred=True
+    )
+
+
+@table_registry.mapped_as_dataclass
+class CatalogStats:
+    """Variações dos totais do catálogo, uma linha por statement.
+
+    Os totais são a soma das linhas: escritas concorrentes só inserem, sem
+    disputar uma linha única. Os triggers compactam as linhas de tempos em
+    tempos.
+    """
+
+    __tablename__ = 'catalog_stats'
+
+    id: Mapped[int] = mapped_column(BigInteger, init=False, primary_key=True)
+    authors: Mapped[int] = mapped_column(default=0)
+    books: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class BookYearStats:
+    __tablename__ = 'book_year_stats'
+
+    year: Mapped[int] = mapped_column(primary_key=True)
+    books: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class AuthorBookStats:
+    __tablename__ = 'author_book_stats'
+    __table_args__ = (
+        Index('ix_author_book_stats_books', 'books', 'author_id'),
+    )
+
+    author_id: Mapped[int] = mapped_column(primary_key=True)
+    books: Mapped[int] = mapped_column(default=0)
+
+
+# Os mesmos triggers da migração, para que `create_all` gere o mesmo schema
+search_triggers = [
+    DDL(f"""
+    CREATE OR REPLACE FUNCTION books_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(
+            to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A'
+        ) || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT name FROM authors WHERE id = NEW.author_id), ''
+        )), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE TRIGGER books_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author_id ON books
+    FOR EACH ROW EXECUTE FUNCTION books_search_vector_update()
+    """),
+    DDL("""
+    CREATE OR REPLACE FUNCTION authors_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE books SET title = title WHERE author_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE TRIGGER authors_search_vector_trigger
+    AFTER UPDATE OF name ON authors
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION authors_search_vector_update()
+    """),
+]
+
+for ddl in search_triggers:
+    event.listen(table_registry.metadata, 'after_create', ddl)
+
+# Agregados mantidos por triggers de statement com transition tables: cada
+# INSERT/UPDATE/DELETE (inclusive o COPY da carga em lote e o ON DELETE
+# CASCADE) aplica só a diferença, então as leituras não varrem o catálogo
+stats_triggers = [
+    DDL("""
+    CREATE OR REPLACE FUNCTION catalog_stats_add(
+        authors_delta integer, books_delta integer
+    )
+    RETURNS void AS $$
+    DECLARE
+        delta_id bigint;
+    BEGIN
+        INSERT INTO catalog_stats (authors, books)
+        VALUES (authors_delta, books_delta)
+        RETURNING id INTO delta_id;
+
+        -- A cada 1000 linhas, junta em uma as que nenhuma outra transação
+        -- está compactando
+        IF mod(delta_id, 1000) = 0 THEN
+            WITH removed AS (
+                DELETE FROM catalog_stats WHERE id IN (
+                    SELECT id FROM catalog_stats FOR UPDATE SKIP LOCKED
+                )
+                RETURNING authors, books
+            )
+            INSERT INTO catalog_stats (authors, books)
+            SELECT sum(authors), sum(books) FROM removed
+            HAVING count(*) > 0;
+        END IF;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE OR REPLACE FUNCTION books_stats_apply(
+        years integer[], author_ids integer[], deltas integer[]
+    )
+    RETURNS void AS $$
+    BEGIN
+        IF deltas IS NULL THEN
+            RETURN;
+        END IF;
+
+        INSERT INTO book_year_stats AS s (year, books)
+        SELECT year, sum(delta) FROM unnest(years, deltas) AS d(year, delta)
+        GROUP BY year ORDER BY year
+        ON CONFLICT (year) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM book_year_stats WHERE year = ANY(years) AND books = 0;
+
+        INSERT INTO author_book_stats AS s (author_id, books)
+        SELECT author_id, sum(delta)
+        FROM unnest(author_ids, deltas) AS d(author_id, delta)
+        GROUP BY author_id ORDER BY author_id
+        ON CONFLICT (author_id) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM author_book_stats
+        WHERE author_id = ANY(author_ids) AND books = 0;
+
+        PERFORM catalog_stats_add(0, sum(delta)::integer)
+        FROM unnest(deltas) AS delta
+        HAVING sum(delta) <> 0;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE OR REPLACE FUNCTION books_stats_update()
+    RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(1)
+            ) FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(-1)
+            ) FROM old_rows;
+        ELSE
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(delta)
+            ) FROM (
+                SELECT o.year, o.author_id, -1 AS delta
+                FROM old_rows o JOIN new_rows n USING (id)
+                WHERE (o.year, o.author_id) IS DISTINCT FROM
+                    (n.year, n.author_id)
+                UNION ALL
+                SELECT n.year, n.author_id, 1
+                FROM old_rows o JOIN new_rows n USING (id)
+                WHERE (o.year, o.author_id) IS DISTINCT FROM
+                    (n.year, n.author_id)
+            ) AS changed;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE TRIGGER books_stats_insert_trigger
+    AFTER INSERT ON books REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """),
+    DDL("""
+    CREATE TRIGGER books_stats_update_trigger
+    AFTER UPDATE ON books
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """),
+    DDL("""
+    CREATE TRIGGER books_stats_delete_trigger
+    AFTER DELETE ON books REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """),
+    DDL("""
+    CREATE OR REPLACE FUNCTION authors_stats_update()
+    RETURNS trigger AS $$
+    DECLARE
+        delta integer;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT count(*) INTO delta FROM new_rows;
+        ELSE
+            SELECT -count(*) INTO delta FROM old_rows;
+        END IF;
+
+        IF delta <> 0 THEN
+            PERFORM catalog_stats_add(delta, 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE TRIGGER authors_stats_insert_trigger
+    AFTER INSERT ON authors REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_stats_update()
+    """),
+    DDL("""
+    CREATE TRIGGER authors_stats_delete_trigger
+    AFTER DELETE ON authors REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_stats_update()
+    """),
+    DDL('INSERT INTO catalog_stats (authors, books) VALUES (0, 0)'),
+]
+
+for ddl in stats_triggers:
+    event.listen(table_registry.metadata, 'after_create', ddl)
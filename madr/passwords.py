@@ -0,0 +1,135 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from madr.metrics import Histogram, family, metrics
+from madr.security import get_password_hash, verify_password
+from madr.settings import Settings
+
+settings = Settings()
+
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+OPERATIONS = {get_password_hash: 'hash', verify_password: 'verify'}
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordPool:
+    """Executor exclusivo para o Argon2, fora do threadpool das rotas."""
+
+    def __init__(self, workers: int, queue_size: int, kind: str = 'thread'):
+        self.workers = workers
+        self.limit = workers + queue_size
+        self.kind = kind
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        self.hash_seconds_sum = 0.0
+        self.hash_seconds_max = 0.0
+        self.durations = {}
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='madr-password'
+                )
+
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Password service is busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(
+                self.executor, _timed, fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.hash_seconds_sum += elapsed
+        self.hash_seconds_max = max(self.hash_seconds_max, elapsed)
+        operation = OPERATIONS.get(fn, fn.__name__)
+        if operation not in self.durations:
+            self.durations[operation] = Histogram(HASH_BUCKETS)
+        self.durations[operation].observe(elapsed)
+
+        return result
+
+    async def hash(self, password: str):
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str):
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def stats(self):
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.workers),
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'hash_seconds_sum': self.hash_seconds_sum,
+            'hash_seconds_max': self.hash_seconds_max,
+        }
+
+    def families(self):
+        return [
+            family(
+                'madr_password_hash_duration_seconds',
+                'histogram',
+                'Duração do Argon2 no executor, por operação.',
+                [
+                    ({'operation': operation}, histogram.sample())
+                    for operation, histogram in self.durations.items()
+                ],
+                buckets=HASH_BUCKETS,
+            ),
+            family(
+                'madr_password_in_flight',
+                'gauge',
+                'Operações de senha em execução ou na fila.',
+                [({}, self.in_flight)],
+            ),
+            family(
+                'madr_password_rejected_total',
+                'counter',
+                'Operações de senha recusadas com 503.',
+                [({}, self.rejected)],
+            ),
+        ]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+)
+metrics.register(password_pool.families)
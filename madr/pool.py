@@ -0,0 +1,142 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from madr.metrics import Histogram, family
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class _TimedCheckout:
+    # Guarda no registro da conexão quanto tempo o checkout esperou;
+    # o evento `checkout` do PoolStats consome esse valor.
+    def _do_get(self):
+        start = time.perf_counter()
+        record = super()._do_get()
+        record.info['checkout_wait'] = time.perf_counter() - start
+        return record
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolStats:
+    """Contadores do pool de um engine, alimentados pelos pool events."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait = Histogram(WAIT_BUCKETS)
+        self._lock = threading.Lock()
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, proxy):
+        wait = connection_record.info.pop('checkout_wait', 0.0)
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_sum += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.wait.observe(wait)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        pool = self.engine.pool
+        snapshot = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+        }
+
+        with self._lock:
+            snapshot.update({
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'wait_seconds_sum': self.wait_seconds_sum,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': (
+                    self.wait_seconds_sum / self.checkouts
+                    if self.checkouts
+                    else 0.0
+                ),
+            })
+
+        return snapshot
+
+    def families(self, name: str):
+        pool = self.engine.pool
+        labels = {'pool': name}
+
+        with self._lock:
+            counters = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+            }
+            wait = self.wait.sample()
+
+        return [
+            family(
+                'madr_db_pool_checkout_wait_seconds',
+                'histogram',
+                'Espera por uma conexão do pool.',
+                [(labels, wait)],
+                buckets=WAIT_BUCKETS,
+            ),
+            family(
+                'madr_db_pool_checked_out',
+                'gauge',
+                'Conexões em uso.',
+                [(labels, pool.checkedout())],
+            ),
+            family(
+                'madr_db_pool_idle',
+                'gauge',
+                'Conexões livres no pool.',
+                [(labels, pool.checkedin())],
+            ),
+            family(
+                'madr_db_pool_overflow',
+                'gauge',
+                'Conexões abertas além do pool_size.',
+                [(labels, max(0, pool.overflow()))],
+            ),
+            *(
+                family(
+                    f'madr_db_pool_{counter}_total',
+                    'counter',
+                    f'Total de {counter} do pool.',
+                    [(labels, value)],
+                )
+                for counter, value in counters.items()
+            ),
+        ]
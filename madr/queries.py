@@ -0,0 +1,189 @@
+import base64
+import json
+import math
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Integer, any_, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+
+from madr.settings import Settings
+
+settings = Settings()
+
+FOREIGN_KEY_VIOLATION = '23503'
+UNIQUE_VIOLATION = '23505'
+
+# Até 10 dígitos e o sinal por id, mais a vírgula
+BatchIdsQuery = Annotated[str, Query(max_length=settings.BATCH_MAX_IDS * 12)]
+
+
+def escape_like(value: str, escape: str = '\\'):
+    return (
+        value.replace(escape, escape * 2)
+        .replace('%', f'{escape}%')
+        .replace('_', f'{escape}_')
+    )
+
+
+def icontains(column, value: str):
+    # ILIKE '%x%' é atendido pelos índices GIN de trigramas (pg_trgm)
+    return column.ilike(f'%{escape_like(value)}%', escape='\\')
+
+
+def is_foreign_key_violation(error: IntegrityError):
+    return getattr(error.orig, 'sqlstate', None) == FOREIGN_KEY_VIOLATION
+
+
+def is_unique_violation(error: IntegrityError):
+    return getattr(error.orig, 'sqlstate', None) == UNIQUE_VIOLATION
+
+
+INT4_MIN, INT4_MAX = -(2**31), 2**31 - 1
+
+
+def encode_cursor(order: str, *values):
+    payload = json.dumps([order, *values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def _valid_value(value, kind):
+    # bool é subclasse de int, mas nunca é um valor válido de cursor
+    if isinstance(value, bool):
+        return False
+    if kind is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    if kind is int:
+        return isinstance(value, int) and INT4_MIN <= value <= INT4_MAX
+
+    return isinstance(value, kind)
+
+
+def decode_cursor(cursor: str, order: str, types: list[type]):
+    """Valores do cursor, se ele foi gerado para a mesma ordenação.
+
+    O cursor guarda a ordenação e cada valor tem o tipo conferido, para que
+    um cursor adulterado vire 400 em vez de erro no banco.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        payload = None
+
+    if (
+        not isinstance(payload, list)
+        or len(payload) != len(types) + 1
+        or payload[0] != order
+        or not all(map(_valid_value, payload[1:], types))
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+
+    return payload[1:]
+
+
+def cursor_order(columns, descending: bool = False):
+    return ('-' if descending else '') + ','.join(c.key for c in columns)
+
+
+def keyset(query, columns, cursor: str | None, descending: bool = False):
+    # Ordenação estável + filtro por valor de linha: (a, b) > (x, y) usa o
+    # índice e não precisa percorrer as linhas das páginas anteriores
+    query = query.order_by(*(c.desc() if descending else c for c in columns))
+
+    if cursor:
+        values = decode_cursor(
+            cursor,
+            cursor_order(columns, descending),
+            [c.type.python_type for c in columns],
+        )
+        row, last = tuple_(*columns), tuple_(*values)
+        query = query.where(row < last if descending else row > last)
+
+    return query
+
+
+def limit_page(query, limit: int | None):
+    # Busca uma linha a mais para saber se existe próxima página
+    return query.limit(None if limit is None else limit + 1)
+
+
+def next_page(items, limit: int | None, columns, descending: bool = False):
+    items = list(items)
+
+    if limit is None or len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    values = [getattr(items[-1], c.key) for c in columns]
+    return items, encode_cursor(cursor_order(columns, descending), *values)
+
+
+def parse_fields(value: str, allowed: tuple[str, ...]):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+
+    if not names or set(names) - set(allowed):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Invalid fields, choose from: {", ".join(allowed)}',
+        )
+
+    return list(dict.fromkeys(names))
+
+
+def project(query, model, names: list[str], columns):
+    # Só as colunas pedidas (e as da ordenação, para o cursor) vão para o
+    # SELECT; o resultado vem em Rows, sem objetos ORM nem identity map
+    extra = [column for column in columns if column.key not in names]
+    return query.with_only_columns(
+        *(getattr(model, name) for name in names), *extra
+    )
+
+
+def parse_ids(value: str):
+    try:
+        ids = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid ids'
+        )
+
+    # Fora do int4 o `= ANY(...::INTEGER[])` falharia no banco
+    if any(not INT4_MIN <= id <= INT4_MAX for id in ids):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'Ids must be between {INT4_MIN} and {INT4_MAX}',
+        )
+
+    return ids
+
+
+async def get_batch(session, model, ids: list[int]):
+    """Busca `ids` em um único `WHERE id = ANY(...)`, na ordem pedida.
+
+    Retorna a lista alinhada com `ids` (None onde não há linha) e os ids
+    não encontrados, sem repetição.
+    """
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Too many ids, the limit is {settings.BATCH_MAX_IDS}',
+        )
+
+    found = {}
+    if ids:
+        # Um único parâmetro array, qualquer que seja o tamanho do lote
+        rows = await session.scalars(
+            select(model).where(
+                model.id == any_(literal(sorted(set(ids)), ARRAY(Integer)))
+            )
+        )
+        found = {row.id: row for row in rows}
+
+    missing = [id for id in dict.fromkeys(ids) if id not in found]
+
+    return [found.get(id) for id in ids], missing
@@ -0,0 +1,184 @@
+import asyncio
+from urllib.parse import unquote, urlsplit
+
+
+class RedisError(Exception):
+    pass
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+
+    return str(value).encode()
+
+
+def encode_command(*args):
+    parts = [f'*{len(args)}\r\n'.encode()]
+    for arg in map(_to_bytes, args):
+        parts.append(b'$%d\r\n%b\r\n' % (len(arg), arg))
+
+    return b''.join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readuntil(b'\r\n')
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b'+':
+        return payload.decode()
+    if kind == b'-':
+        raise RedisError(payload.decode())
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        size = int(payload)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b'*':
+        size = int(payload)
+        if size < 0:
+            return None
+        # Lê o array inteiro antes de acusar um erro (ex.: resposta do EXEC),
+        # para não deixar respostas pendentes na conexão
+        items = []
+        for _ in range(size):
+            try:
+                items.append(await read_reply(reader))
+            except RedisError as exc:
+                items.append(exc)
+        for item in items:
+            if isinstance(item, RedisError):
+                raise item
+        return items
+
+    raise RedisError(f'Unexpected reply: {line!r}')
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, *args):
+        self.writer.write(encode_command(*args))
+        await self.writer.drain()
+        return await read_reply(self.reader)
+
+    async def pipeline(self, commands):
+        self.writer.write(b''.join(encode_command(*c) for c in commands))
+        await self.writer.drain()
+
+        replies = []
+        for _ in commands:
+            try:
+                replies.append(await read_reply(self.reader))
+            except RedisError as exc:
+                replies.append(exc)
+
+        return replies
+
+    def close(self):
+        self.writer.close()
+
+
+class RedisClient:
+    """Cliente mínimo do protocolo RESP2, com pool de conexões asyncio.
+
+    Cobre só os comandos usados pelos caches (GET/SET/MGET/INCR/...) e o
+    pub/sub da invalidação; qualquer servidor compatível com Redis serve.
+    """
+
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 1.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip('/') or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle = []
+        self._semaphore = None
+        self._loop = None
+
+    async def connect(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        connection = _Connection(reader, writer)
+
+        if self.password:
+            await connection.execute('AUTH', self.password)
+        if self.db:
+            await connection.execute('SELECT', self.db)
+
+        return connection
+
+    def _pool(self):
+        # Conexões e semáforo pertencem a um event loop; o TestClient e o
+        # reload do servidor podem trocar de loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+
+        return self._semaphore
+
+    async def _run(self, operation):
+        async with self._pool():
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await self.connect()
+                reply = await asyncio.wait_for(
+                    operation(connection), self.timeout
+                )
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+
+            self._idle.append(connection)
+            return reply
+
+    async def execute(self, *args):
+        return await self._run(lambda connection: connection.execute(*args))
+
+    async def transaction(self, *commands):
+        """Executa `commands` entre MULTI e EXEC, em uma só ida ao servidor.
+
+        Retorna a resposta de cada comando, como no EXEC.
+        """
+        replies = await self._run(
+            lambda connection: connection.pipeline([
+                ('MULTI',),
+                *commands,
+                ('EXEC',),
+            ])
+        )
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+
+        return replies[-1]
+
+    async def subscribe(self, channel: str):
+        """Gera as mensagens publicadas no canal, em uma conexão dedicada."""
+        connection = await self.connect()
+        try:
+            await connection.execute('SUBSCRIBE', channel)
+            while True:
+                kind, _, message = await read_reply(connection.reader)
+                if kind == b'message':
+                    yield message
+        finally:
+            connection.close()
+
+    def close(self):
+        for connection in self._idle:
+            connection.close()
+        self._idle = []
@@ -0,0 +1,193 @@
+import hashlib
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import compile_path
+
+from madr.cache import cache_bus, make_cache
+from madr.settings import Settings
+
+settings = Settings()
+
+
+def _weak_etag(body: bytes):
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str):
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in {
+        tag.removeprefix('W/') for tag in candidates
+    }
+
+
+class ResponseCache:
+    """Cache de respostas GET, por rota e query string normalizada.
+
+    Cada rota declara de quais recursos (tags) depende; as rotas de escrita
+    incrementam a geração das tags, o que muda a chave das entradas antigas.
+    As gerações ficam no mesmo backend das entradas. Corpos acima de
+    `max_body_bytes` (ex.: listagens sem `limit`) não são guardados.
+    """
+
+    def __init__(
+        self,
+        entries,
+        cache_control: str,
+        enabled: bool = True,
+        bus=cache_bus,
+        max_body_bytes: int | None = None,
+    ):
+        self.entries = entries
+        self.bus = bus
+        self.cache_control = cache_control
+        self.enabled = enabled
+        self.max_body_bytes = max_body_bytes
+        self.not_modified = self.too_large = 0
+        self.too_large = 0
+        self._routes = []
+        bus.register('responses', self.bump)
+
+    def cache_route(self, path: str, tags: tuple[str, ...]):
+        regex, _, _ = compile_path(path)
+        self._routes.append((regex, tags))
+
+    def tags_for(self, path: str):
+        for regex, tags in self._routes:
+            if regex.match(path):
+                return tags
+
+        return None
+
+    async def key(self, path: str, query_string: bytes, tags: tuple):
+        generations = await self.entries.get_many([
+            f'generation:{tag}' for tag in tags
+        ])
+        if generations is None:
+            return None
+
+        query = parse_qsl(query_string.decode(), keep_blank_values=True)
+        return path, tuple(sorted(query)), tuple(generations)
+
+    async def bump(self, *tags: str):
+        for tag in tags:
+            await self.entries.incr(f'generation:{tag}')
+
+    async def invalidate(self, *tags: str):
+        await self.bus.publish('responses', *tags)
+
+    async def clear(self):
+        await self.entries.clear()
+        self.not_modified = self.too_large = 0
+
+    def storable(self, body: bytes):
+        if self.max_body_bytes is None or len(body) <= self.max_body_bytes:
+            return True
+
+        self.too_large += 1
+        return False
+
+    def stats(self):
+        stats = self.entries.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'enabled': self.enabled,
+            'not_modified': self.not_modified,
+            'too_large': self.too_large,
+            'hit_ratio': stats['hits'] / lookups if lookups else 0.0,
+        })
+
+        return stats
+
+
+class ResponseCacheMiddleware:
+    """Serve GETs cacheáveis da memória e responde 304 a ETags válidos."""
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or scope['method'] != 'GET'
+            or not self.cache.enabled
+        ):
+            return await self.app(scope, receive, send)
+
+        tags = self.cache.tags_for(scope['path'])
+        if tags is None:
+            return await self.app(scope, receive, send)
+
+        key = await self.cache.key(scope['path'], scope['query_string'], tags)
+        if key is None:
+            # Backend indisponível: serve sem cache
+            return await self.app(scope, receive, send)
+
+        if_none_match = Headers(scope=scope).get('if-none-match')
+        cached = await self.cache.entries.get(key)
+
+        if cached is None:
+            cached = await self._render(scope, receive)
+
+            if cached['status'] != HTTPStatus.OK:
+                return await self._send(send, cached, cached['body'])
+
+            if self.cache.storable(cached['body']):
+                await self.cache.entries.set(key, cached)
+
+        if if_none_match and _etag_matches(if_none_match, cached['etag']):
+            self.cache.not_modified += 1
+            return await self._send(
+                send, {**cached, 'status': HTTPStatus.NOT_MODIFIED}, b''
+            )
+
+        await self._send(send, cached, cached['body'])
+
+    async def _render(self, scope, receive):
+        response = {'status': 500, 'headers': [], 'body': b''}
+        chunks = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = message.get('headers', [])
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, capture)
+        response['body'] = b''.join(chunks)
+        response['etag'] = _weak_etag(response['body'])
+
+        return response
+
+    async def _send(self, send, response, body: bytes):
+        headers = MutableHeaders(raw=list(response['headers']))
+
+        if response['status'] in {HTTPStatus.OK, HTTPStatus.NOT_MODIFIED}:
+            headers['etag'] = response['etag']
+            headers['cache-control'] = self.cache.cache_control
+
+        if not body:
+            del headers['content-length']
+
+        await send({
+            'type': 'http.response.start',
+            'status': response['status'],
+            'headers': headers.raw,
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+response_cache = ResponseCache(
+    make_cache(
+        'responses',
+        maxsize=settings.RESPONSE_CACHE_MAXSIZE,
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    ),
+    cache_control=settings.RESPONSE_CACHE_CONTROL,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+    max_body_bytes=settings.RESPONSE_CACHE_MAX_BODY_BYTES,
+)
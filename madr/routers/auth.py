@@ -4,14 +4,15 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
+from sqlalchemy.orm import undefer
 
 from madr.database import get_session
 from madr.models import User
+from madr.passwords import password_pool
 from madr.schemas import Token
 from madr.security import (
     create_access_token,
     get_current_user,
-    verify_password,
 )
 
 router = APIRouter(prefix='/auth', tags=['auth'])
@@ -20,13 +21,19 @@ T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
 @router.post('/token', response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: T_OAuth2Form,
     session=Depends(get_session),
 ):
-    user = session.scalar(select(User).where(User.email == form_data.username))
-
-    if not user or not verify_password(form_data.password, user.password):
+    user = await session.scalar(
+        select(User)
+        .options(undefer(User.password))
+        .where(User.email == form_data.username)
+    )
+
+    if not user or not await password_pool.verify(
+        form_data.password, user.password
+    ):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password',
@@ -38,6 +45,6 @@ def login_for_access_token(
 
 
 @router.post('/refresh_token', response_model=Token)
-def refresh_access_token(user: User = Depends(get_current_user)):
+async def refresh_access_token(user: User = Depends(get_current_user)):
     new_access_token = create_access_token(data={'sub': user.email})
     return {'access_token': new_access_token, 'token_type': 'bearer'}
@@ -1,79 +1,235 @@
+from collections.abc import Callable
 from http import HTTPStatus
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from madr.database import get_session
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from madr.database import (
+    get_read_session,
+    get_read_session_factory,
+    get_session,
+)
+from madr.export import ExportFormat, export_response
+from madr.ingest import ingest_authors, read_rows, spool_body
 from madr.models import Author, User
-from madr.schemas import AuthorList, AuthorPublic, AuthorSchema
+from madr.queries import (
+    BatchIdsQuery,
+    get_batch,
+    icontains,
+    is_unique_violation,
+    keyset,
+    limit_page,
+    next_page,
+    parse_fields,
+    parse_ids,
+    project,
+)
+from madr.response_cache import response_cache
+from madr.schemas import (
+    AuthorBatch,
+    AuthorList,
+    AuthorPublic,
+    AuthorSchema,
+    AuthorWithBooks,
+    BatchIds,
+    BulkReport,
+)
 from madr.security import get_current_user
+from madr.serialization import fields_response, page_response
+from madr.settings import Settings
+from madr.totals import TotalMode, page_total
 
 router = APIRouter(prefix='/authors', tags=['authors'])
+settings = Settings()
 
-Session = Annotated[Session, Depends(get_session)]
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+SessionFactory = Annotated[Callable, Depends(get_read_session_factory)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
+AUTHOR_FIELDS = ('id', 'name')
+
+response_cache.cache_route('/authors/', tags=('authors',))
+response_cache.cache_route('/authors/batch', tags=('authors',))
+# O detalhe pode embutir os livros (include=books)
+response_cache.cache_route(
+    '/authors/{author_id:int}', tags=('authors', 'books')
+)
+
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=AuthorPublic)
-def create_author(author: AuthorSchema, session: Session, user: CurrentUser):
-    db_author = session.scalar(
-        select(Author).where(Author.name == author.name)
+async def create_author(
+    author: AuthorSchema, session: Session, user: CurrentUser
+):
+    # Um único INSERT: conflitos de nome (inclusive concorrentes) viram 409
+    db_author = await session.scalar(
+        insert(Author)
+        .values(name=author.name)
+        .on_conflict_do_nothing(index_elements=['name'])
+        .returning(Author)
     )
 
     if not db_author:
-        author = Author(
-            name=author.name,
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Author is already included in MADR!',
         )
-        session.add(author)
-        session.commit()
-        session.refresh(author)
 
-        return author
+    await session.commit()
+    await response_cache.invalidate('authors')
 
-    raise HTTPException(
-        status_code=HTTPStatus.CONFLICT,
-        detail='Author is already included in MADR!',
-    )
+    return db_author
+
+
+@router.post('/bulk', response_model=BulkReport)
+async def bulk_create_authors(
+    request: Request, session: Session, user: CurrentUser
+):
+    # Aceita NDJSON (padrão) ou CSV com cabeçalho, conforme o Content-Type
+    content_type = request.headers.get('content-type', '')
+
+    with await spool_body(request) as body:
+        report = await ingest_authors(session, read_rows(body, content_type))
+
+    await response_cache.invalidate('authors')
+
+    return report.as_dict()
 
 
 @router.get('/', response_model=AuthorList)
-def list_authors(  # noqa
-    session: Session,
+async def list_authors(  # noqa
+    session: ReadSession,
+    response: Response,
     name: str or None = None,
     offset: int or None = None,
     limit: int or None = None,
+    cursor: str or None = None,
+    total: TotalMode | None = None,
+    fields: str | None = None,
 ):
     query = select(Author)
 
     if name:
-        query = query.filter(Author.name.contains(name))
+        query = query.filter(icontains(Author.name, name))
+
+    total = await page_total(session, response, query, total)
+    query = keyset(query, [Author.id], cursor)
+
+    if fields is not None:
+        names = parse_fields(fields, AUTHOR_FIELDS)
+        query = project(query, Author, names, [Author.id])
+        authors = await session.execute(
+            limit_page(query.offset(offset), limit)
+        )
+        authors, next_cursor = next_page(authors, limit, [Author.id])
+        page = {'authors': authors, 'next_cursor': next_cursor, 'total': total}
+
+        return fields_response(response, page, 'authors', names)
+
+    authors = await session.scalars(limit_page(query.offset(offset), limit))
+    authors, next_cursor = next_page(authors, limit, [Author.id])
+
+    page = {'authors': authors, 'next_cursor': next_cursor, 'total': total}
+
+    if settings.FAST_JSON_ENABLED:
+        return page_response(response, page, 'authors', AuthorSchema)
+
+    return page
+
+
+@router.get('/export')
+async def export_authors(
+    session_factory: SessionFactory, format: ExportFormat = 'ndjson'
+):
+    query = select(Author.id, Author.name).order_by(Author.id)
 
-    authors = session.scalars(query.offset(offset).limit(limit)).all()
+    return export_response(session_factory, query, format, 'authors')
 
-    return {'authors': authors}
+
+@router.get('/batch', response_model=AuthorBatch)
+async def batch_get_authors(session: ReadSession, ids: BatchIdsQuery):
+    authors, missing = await get_batch(session, Author, parse_ids(ids))
+
+    return {'authors': authors, 'missing': missing}
+
+
+@router.post('/batch', response_model=AuthorBatch)
+async def batch_get_authors_by_body(session: ReadSession, body: BatchIds):
+    authors, missing = await get_batch(session, Author, body.ids)
+
+    return {'authors': authors, 'missing': missing}
+
+
+@router.get('/{author_id}', response_model=AuthorPublic | AuthorWithBooks)
+async def read_author(
+    author_id: int,
+    session: ReadSession,
+    include: Literal['books'] | None = None,
+):
+    query = select(Author).where(Author.id == author_id)
+
+    if include == 'books':
+        # Um SELECT extra para todos os livros, em vez de um por acesso
+        query = query.options(selectinload(Author.books))
+
+    db_author = await session.scalar(query)
+
+    if not db_author:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail='Author not found in MADR.',
+        )
+
+    if include == 'books':
+        return AuthorWithBooks.model_validate(db_author)
+
+    return AuthorPublic.model_validate(db_author)
 
 
 @router.delete('/{author_id}')
-def delete_author(author_id: int, session: Session, user: CurrentUser):
-    author = session.scalar(select(Author).where(Author.id == author_id))
+async def delete_author(author_id: int, session: Session, user: CurrentUser):
+    # Os livros do autor são apagados pelo ON DELETE CASCADE da FK
+    deleted = await session.scalar(
+        delete(Author).where(Author.id == author_id).returning(Author.id)
+    )
 
-    if not author:
+    if not deleted:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Author not found in MADR.',
         )
 
-    session.delete(author)
-    session.commit()
+    await session.commit()
+    # ON DELETE CASCADE também removeu os livros
+    await response_cache.invalidate('authors', 'books')
 
     return {'message': 'Author has been deleted successfully.'}
 
 
 @router.patch('/{author_id}', response_model=AuthorPublic)
-def patch_author(author_id: int, session: Session, author: AuthorSchema):
-    db_author = session.scalar(select(Author).where(Author.id == author_id))
+async def patch_author(author_id: int, session: Session, author: AuthorSchema):
+    # UPDATE ... RETURNING: sem SELECT antes nem refresh depois
+    try:
+        db_author = await session.scalar(
+            update(Author)
+            .where(Author.id == author_id)
+            .values(**author.model_dump(exclude_unset=True))
+            .returning(Author)
+        )
+    except IntegrityError as error:
+        await session.rollback()
+        if not is_unique_violation(error):
+            raise
+
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Author is already included in MADR!',
+        )
 
     if not db_author:
         raise HTTPException(
@@ -81,11 +237,7 @@ def patch_author(author_id: int, session: Session, author: AuthorSchema):
             detail='Author not found in MADR.',
         )
 
-    for key, value in author.model_dump(exclude_unset=True).items():
-        setattr(db_author, key, value)
-
-    session.add(db_author)
-    session.commit()
-    session.refresh(db_author)
+    await session.commit()
+    await response_cache.invalidate('authors')
 
     return db_author
@@ -0,0 +1,59 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import REAL, and_, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.database import get_read_session
+from madr.models import SEARCH_CONFIG, Author, Book
+from madr.queries import decode_cursor, encode_cursor
+from madr.schemas import SearchResults
+
+router = APIRouter(prefix='/search', tags=['search'])
+
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+SEARCH_ORDER = '-rank,id'
+
+
+@router.get('/', response_model=SearchResults)
+async def search_books(
+    session: ReadSession,
+    q: Annotated[str, Query(min_length=1)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Book.search_vector, tsquery)
+
+    query = (
+        select(
+            Book.id,
+            Book.title,
+            Book.year,
+            Book.author_id,
+            Author.name.label('author'),
+            rank.label('rank'),
+        )
+        .join(Author, Book.author_id == Author.id)
+        .where(Book.search_vector.bool_op('@@')(tsquery))
+        .order_by(rank.desc(), Book.id)
+    )
+
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, SEARCH_ORDER, [float, int])
+        # ts_rank é `real`; comparar como real evita erro de arredondamento
+        last_rank = cast(last_rank, REAL)
+        query = query.where(
+            or_(rank < last_rank, and_(rank == last_rank, Book.id > last_id))
+        )
+
+    rows = (await session.execute(query.limit(limit + 1))).mappings().all()
+    results, extra = rows[:limit], rows[limit:]
+
+    next_cursor = None
+    if extra:
+        last = results[-1]
+        next_cursor = encode_cursor(SEARCH_ORDER, last['rank'], last['id'])
+
+    return {'results': results, 'next_cursor': next_cursor}
@@ -1,63 +1,121 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from madr.database import get_session
+from madr.database import get_read_session, get_session
 from madr.models import User
-from madr.schemas import UserList, UserPublic, UserSchema
-from madr.security import get_current_user, get_password_hash
+from madr.passwords import password_pool
+from madr.queries import (
+    BatchIdsQuery,
+    get_batch,
+    keyset,
+    limit_page,
+    next_page,
+    parse_fields,
+    parse_ids,
+    project,
+)
+from madr.response_cache import response_cache
+from madr.schemas import BatchIds, UserBatch, UserList, UserPublic, UserSchema
+from madr.security import (
+    get_current_user,
+    invalidate_user_cache,
+)
+from madr.serialization import fields_response, page_response
+from madr.settings import Settings
+from madr.totals import TotalMode, page_total
 
 router = APIRouter(prefix='/users', tags=['users'])
+settings = Settings()
 
-Session = Annotated[Session, Depends(get_session)]
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
+USER_FIELDS = ('id', 'username', 'email')
+
+response_cache.cache_route('/users/', tags=('users',))
+response_cache.cache_route('/users/batch', tags=('users',))
+response_cache.cache_route('/users/{user_id:int}/', tags=('users',))
+
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: Session):
-    db_user = session.scalar(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email)
+async def create_user(user: UserSchema, session: Session):
+    # Sem alvo no ON CONFLICT: username ou email repetidos viram 409
+    db_user = await session.scalar(
+        insert(User)
+        .values(
+            username=user.username,
+            email=user.email,
+            password=await password_pool.hash(user.password),
         )
+        .on_conflict_do_nothing()
+        .returning(User)
     )
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='conta já consta no MADR',
-            )
-
-        elif db_user.email == user.email:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='conta já consta no MADR',
-            )
-
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        password=get_password_hash(user.password),
-    )
+    if not db_user:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='conta já consta no MADR',
+        )
 
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await response_cache.invalidate('users')
 
     return db_user
 
 
 @router.get('/', response_model=UserList)
-def read_users(session: Session, limit: int = 10, skip: int = 0):
-    user = session.scalars(select(User).limit(limit).offset(skip))
-    return {'users': user}
+async def read_users(  # noqa
+    session: ReadSession,
+    response: Response,
+    limit: int = 10,
+    skip: int = 0,
+    cursor: str | None = None,
+    total: TotalMode | None = None,
+    fields: str | None = None,
+):
+    total = await page_total(session, response, select(User), total)
+    query = keyset(select(User), [User.id], cursor)
+
+    if fields is not None:
+        names = parse_fields(fields, USER_FIELDS)
+        query = project(query, User, names, [User.id])
+        rows = await session.execute(limit_page(query.offset(skip), limit))
+        rows, next_cursor = next_page(rows, limit, [User.id])
+        page = {'users': rows, 'next_cursor': next_cursor, 'total': total}
+
+        return fields_response(response, page, 'users', names)
+    user = await session.scalars(limit_page(query.offset(skip), limit))
+    user, next_cursor = next_page(user, limit, [User.id])
+    page = {'users': user, 'next_cursor': next_cursor, 'total': total}
+
+    if settings.FAST_JSON_ENABLED:
+        return page_response(response, page, 'users', UserPublic)
+
+    return page
+
+
+@router.get('/batch', response_model=UserBatch)
+async def batch_get_users(session: ReadSession, ids: BatchIdsQuery):
+    users, missing = await get_batch(session, User, parse_ids(ids))
+
+    return {'users': users, 'missing': missing}
+
+
+@router.post('/batch', response_model=UserBatch)
+async def batch_get_users_by_body(session: ReadSession, body: BatchIds):
+    users, missing = await get_batch(session, User, body.ids)
+
+    return {'users': users, 'missing': missing}
 
 
 @router.put('/{user_id}', response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserSchema,
     session: Session,
@@ -70,17 +128,17 @@ def update_user(
 
     current_user.email = user.email
     current_user.username = user.username
-    current_user.password = get_password_hash(user.password)
+    current_user.password = await password_pool.hash(user.password)
 
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await response_cache.invalidate('users')
+    await invalidate_user_cache(current_user.id)
 
     return current_user
 
 
 @router.delete('/{user_id}')
-def delete_user(
+async def delete_user(
     user_id: int,
     session: Session,
     current_user: CurrentUser,
@@ -91,15 +149,17 @@ def delete_user(
             detail='Não autorizado',
         )
 
-    session.delete(current_user)
-    session.commit()
+    await session.delete(current_user)
+    await session.commit()
+    await response_cache.invalidate('users')
+    await invalidate_user_cache(user_id)
 
     return {'message': 'Conta deletada com sucesso'}
 
 
 @router.get('/{user_id}/', response_model=UserPublic)
-def read_user(user_id: int, session: Session):
-    db_user = session.scalar(select(User).where(User.id == user_id))
+async def read_user(user_id: int, session: ReadSession):
+    db_user = await session.scalar(select(User).where(User.id == user_id))
 
     if not db_user:
         raise HTTPException(
@@ -0,0 +1,56 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madr.database import get_read_session
+from madr.models import Author, AuthorBookStats, BookYearStats, CatalogStats
+from madr.schemas import AuthorStatsList, CatalogTotals, YearStatsList
+
+router = APIRouter(prefix='/stats', tags=['stats'])
+
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+@router.get('/', response_model=CatalogTotals)
+async def catalog_totals(session: ReadSession):
+    # Soma das variações gravadas pelos triggers; a compactação periódica
+    # mantém a tabela com poucas linhas
+    totals = await session.execute(
+        select(
+            func.coalesce(func.sum(CatalogStats.authors), 0).label('authors'),
+            func.coalesce(func.sum(CatalogStats.books), 0).label('books'),
+        )
+    )
+
+    return totals.mappings().one()
+
+
+@router.get('/years', response_model=YearStatsList)
+async def books_per_year(session: ReadSession):
+    years = await session.execute(
+        select(BookYearStats.year, BookYearStats.books).order_by(
+            BookYearStats.year
+        )
+    )
+
+    return {'years': years.mappings().all()}
+
+
+@router.get('/authors', response_model=AuthorStatsList)
+async def books_per_author(
+    session: ReadSession,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    # Autores com mais livros: varredura reversa do índice (books, author_id)
+    authors = await session.execute(
+        select(AuthorBookStats.author_id, Author.name, AuthorBookStats.books)
+        .join(Author, Author.id == AuthorBookStats.author_id)
+        .order_by(
+            AuthorBookStats.books.desc(), AuthorBookStats.author_id.desc()
+        )
+        .limit(limit)
+    )
+
+    return {'authors': authors.mappings().all()}
@@ -0,0 +1,54 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from madr.cache import cache_bus
+from madr.database import pool_stats
+from madr.models import User
+from madr.passwords import password_pool
+from madr.response_cache import response_cache
+from madr.security import get_current_user, user_cache
+from madr.settings import Settings
+from madr.totals import total_cache
+
+router = APIRouter(prefix='/internal', tags=['internal'])
+settings = Settings()
+
+
+def get_admin_user(user: User = Depends(get_current_user)):
+    # Qualquer um pode criar uma conta; só os e-mails da allow-list veem
+    # os detalhes operacionais
+    admins = {email.lower() for email in settings.INTERNAL_ADMIN_EMAILS}
+    if user.email.lower() not in admins:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
+        )
+
+    return user
+
+
+AdminUser = Annotated[User, Depends(get_admin_user)]
+
+
+@router.get('/cache')
+def cache_stats(user: AdminUser):
+    return {
+        'users': user_cache.stats(),
+        'responses': response_cache.stats(),
+        'totals': total_cache.stats(),
+        'invalidations': {
+            'published': cache_bus.published,
+            'received': cache_bus.received,
+        },
+    }
+
+
+@router.get('/passwords')
+def password_stats(user: AdminUser):
+    return password_pool.stats()
+
+
+@router.get('/pool')
+def database_pool_stats(user: AdminUser):
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
@@ -1,95 +1,311 @@
+from collections.abc import Callable
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from madr.database import get_session
-from madr.models import Author, Book, User
-from madr.schemas import BookList, BookPublic, BookSchema
+from madr.database import (
+    get_read_session,
+    get_read_session_factory,
+    get_session,
+)
+from madr.export import ExportFormat, export_response
+from madr.ingest import ingest_books, read_rows, spool_body
+from madr.models import Book, User
+from madr.queries import (
+    BatchIdsQuery,
+    get_batch,
+    icontains,
+    is_foreign_key_violation,
+    is_unique_violation,
+    keyset,
+    limit_page,
+    next_page,
+    parse_fields,
+    parse_ids,
+    project,
+)
+from madr.response_cache import response_cache
+from madr.schemas import (
+    BatchIds,
+    BookBatch,
+    BookList,
+    BookListWithAuthor,
+    BookPublic,
+    BookSchema,
+    BookWithAuthor,
+    BulkDeleteReport,
+    BulkReport,
+)
 from madr.security import get_current_user
+from madr.serialization import fields_response, page_response
+from madr.settings import Settings
+from madr.totals import TotalMode, page_total
 
 router = APIRouter(prefix='/books', tags=['books'])
+settings = Settings()
 
-Session = Annotated[Session, Depends(get_session)]
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+SessionFactory = Annotated[Callable, Depends(get_read_session_factory)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
+BookOrder = Literal['id', '-id', 'year', '-year']
+BOOK_ORDERS = {'id': [Book.id], 'year': [Book.year, Book.id]}
+BOOK_FIELDS = ('id', 'title', 'year', 'author_id')
+MAX_DELETE_IDS = 1000
+
+# A listagem pode embutir o autor (include=author)
+response_cache.cache_route('/books/', tags=('books', 'authors'))
+response_cache.cache_route('/books/batch', tags=('books',))
+response_cache.cache_route('/books/{book_id:int}', tags=('books',))
+
+
+async def _write_book(session, statement):
+    try:
+        return await session.scalar(statement)
+    except IntegrityError as error:
+        await session.rollback()
+        if is_foreign_key_violation(error):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail='Author does not exist',
+            )
+
+        if is_unique_violation(error):
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='Book is already included in MADR!',
+            )
+
+        raise
+
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=BookPublic)
-def create_book(book: BookSchema, session: Session):
-    db_book = session.scalar(select(Book).where(Book.title == book.title))
-    author = session.scalar(select(Author).where(Author.id == book.author_id))
+async def create_book(book: BookSchema, session: Session):
+    # Um único INSERT: título repetido vira 409 e autor inexistente (FK) 404
+    db_book = await _write_book(
+        session,
+        insert(Book)
+        .values(title=book.title, year=book.year, author_id=book.author_id)
+        .on_conflict_do_nothing(index_elements=['title'])
+        .returning(Book),
+    )
 
-    if not author:
+    if not db_book:
         raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Author does not exist'
+            status_code=HTTPStatus.CONFLICT,
+            detail='Book is already included in MADR!',
         )
 
-    if not db_book:
-        book = Book(title=book.title, year=book.year, author_id=author.id)
-        session.add(book)
-        session.commit()
-        session.refresh(book)
+    await session.commit()
+    await response_cache.invalidate('books')
 
-        return book
+    return db_book
 
-    raise HTTPException(
-        status_code=HTTPStatus.CONFLICT,
-        detail='Book is already included in MADR!',
-    )
 
+@router.post('/bulk', response_model=BulkReport)
+async def bulk_create_books(
+    request: Request, session: Session, user: CurrentUser
+):
+    # Aceita NDJSON (padrão) ou CSV com cabeçalho, conforme o Content-Type
+    content_type = request.headers.get('content-type', '')
 
-@router.get('/', response_model=BookList)
-def list_books(  # noqa
-    session: Session,
+    with await spool_body(request) as body:
+        report = await ingest_books(session, read_rows(body, content_type))
+
+    await response_cache.invalidate('books', 'authors')
+
+    return report.as_dict()
+
+
+@router.get('/', response_model=BookList | BookListWithAuthor)
+async def list_books(  # noqa
+    session: ReadSession,
+    response: Response,
     title: str or None = None,
     year: int or None = None,
+    year_min: int or None = None,
+    year_max: int or None = None,
+    author_id: int or None = None,
+    order_by: BookOrder = 'id',
     offset: int or None = None,
     limit: int or None = None,
+    cursor: str or None = None,
+    include: Literal['author'] | None = None,
+    total: TotalMode | None = None,
+    fields: str | None = None,
 ):
+    if fields is not None and include:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='fields cannot be combined with include',
+        )
+
     query = select(Book)
 
     if title:
-        query = query.filter(Book.title.contains(title))
+        query = query.filter(icontains(Book.title, title))
 
     if year:
         query = query.filter(Book.year == year)
 
-    books = session.scalars(query.offset(offset).limit(limit)).all()
+    if year_min is not None:
+        query = query.filter(Book.year >= year_min)
 
-    return {'books': books}
+    if year_max is not None:
+        query = query.filter(Book.year <= year_max)
 
+    if author_id is not None:
+        query = query.filter(Book.author_id == author_id)
 
-@router.delete('/{book_id}')
-def delete_book(book_id: int, session: Session):
-    book = session.scalar(select(Book).where(Book.id == book_id))
+    total = await page_total(session, response, query, total)
+
+    # Cada ordenação é servida por um índice: pk, (year, id) ou (author_id, id)
+    columns = BOOK_ORDERS[order_by.lstrip('-')]
+    descending = order_by.startswith('-')
+    query = keyset(query, columns, cursor, descending)
+
+    if fields is not None:
+        names = parse_fields(fields, BOOK_FIELDS)
+        query = project(query, Book, names, columns)
+        books = await session.execute(limit_page(query.offset(offset), limit))
+        books, next_cursor = next_page(books, limit, columns, descending)
+        page = {'books': books, 'next_cursor': next_cursor, 'total': total}
+
+        return fields_response(response, page, 'books', names)
+
+    if include == 'author':
+        # Many-to-one obrigatório: o autor vem no mesmo SELECT, via JOIN
+        query = query.options(joinedload(Book.author, innerjoin=True))
+
+    books = await session.scalars(limit_page(query.offset(offset), limit))
+    books, next_cursor = next_page(books, limit, columns, descending)
+    page = {'books': books, 'next_cursor': next_cursor, 'total': total}
+
+    if settings.FAST_JSON_ENABLED:
+        schema = BookWithAuthor if include == 'author' else BookSchema
+        return page_response(response, page, 'books', schema)
+
+    if include == 'author':
+        return BookListWithAuthor.model_validate(page, from_attributes=True)
+
+    return BookList.model_validate(page, from_attributes=True)
+
+
+@router.get('/export')
+async def export_books(
+    session_factory: SessionFactory, format: ExportFormat = 'ndjson'
+):
+    query = select(Book.id, Book.title, Book.year, Book.author_id)
+
+    return export_response(
+        session_factory, query.order_by(Book.id), format, 'books'
+    )
+
+
+@router.get('/batch', response_model=BookBatch)
+async def batch_get_books(session: ReadSession, ids: BatchIdsQuery):
+    books, missing = await get_batch(session, Book, parse_ids(ids))
+
+    return {'books': books, 'missing': missing}
+
+
+@router.post('/batch', response_model=BookBatch)
+async def batch_get_books_by_body(session: ReadSession, body: BatchIds):
+    books, missing = await get_batch(session, Book, body.ids)
+
+    return {'books': books, 'missing': missing}
+
+
+@router.get('/{book_id}', response_model=BookPublic)
+async def read_book(book_id: int, session: ReadSession):
+    book = await session.scalar(select(Book).where(Book.id == book_id))
 
     if not book:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Book not found.'
         )
 
-    session.delete(book)
-    session.commit()
+    return book
+
+
+@router.delete('/', response_model=BulkDeleteReport)
+async def bulk_delete_books(
+    session: Session,
+    user: CurrentUser,
+    author_id: int | None = None,
+    id: Annotated[list[int] | None, Query(max_length=MAX_DELETE_IDS)] = None,
+):
+    # Um único DELETE, sem carregar os livros na sessão
+    if author_id is None and not id:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Inform author_id or id to delete books.',
+        )
+
+    query = delete(Book)
+
+    if author_id is not None:
+        query = query.where(Book.author_id == author_id)
+
+    if id:
+        query = query.where(Book.id.in_(id))
+
+    result = await session.execute(
+        query.execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    await response_cache.invalidate('books')
+
+    return {'deleted': result.rowcount}
+
+
+@router.delete('/{book_id}')
+async def delete_book(book_id: int, session: Session):
+    deleted = await session.scalar(
+        delete(Book).where(Book.id == book_id).returning(Book.id)
+    )
+
+    if not deleted:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Book not found.'
+        )
+
+    await session.commit()
+    await response_cache.invalidate('books')
 
     return {'message': 'Book has been deleted successfully.'}
 
 
 @router.patch('/{book_id}', response_model=BookPublic)
-def patch_book(book_id: int, session: Session, book: BookSchema):
-    db_book = session.scalar(select(Book).where(Book.id == book_id))
+async def patch_book(book_id: int, session: Session, book: BookSchema):
+    db_book = await _write_book(
+        session,
+        update(Book)
+        .where(Book.id == book_id)
+        .values(**book.model_dump(exclude_unset=True))
+        .returning(Book),
+    )
 
     if not db_book:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Book not found.'
         )
 
-    for key, value in book.model_dump(exclude_unset=True).items():
-        setattr(db_book, key, value)
-
-    session.add(db_book)
-    session.commit()
-    session.refresh(db_book)
+    await session.commit()
+    await response_cache.invalidate('books')
 
     return db_book
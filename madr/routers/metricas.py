@@ -0,0 +1,16 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, HTTPException, Response
+
+from madr.metrics import CONTENT_TYPE, metrics
+
+router = APIRouter(tags=['metrics'])
+
+
+@router.get('/metrics', include_in_schema=False)
+async def export_metrics():
+    # Opt-in (METRICS_ENABLED): sem isso a rota não existe para o cliente
+    if not metrics.enabled:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+
+    return Response(await metrics.exposition(), media_type=CONTENT_TYPE)
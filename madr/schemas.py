@@ -1,6 +1,29 @@
 import re
+from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict, EmailStr, validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    model_validator,
+    validator,
+)
+
+from madr.settings import Settings
+
+settings = Settings()
+
+# Colunas integer do Postgres: fora disso o COPY/INSERT falha no banco
+Int4 = Annotated[int, Field(ge=-(2**31), le=2**31 - 1)]
+
+
+def reject_nul(value: str):
+    # O Postgres não aceita NUL em colunas de texto
+    if '\x00' in value:
+        raise ValueError('must not contain NUL characters')
+
+    return value
 
 
 class UserSchema(BaseModel):
@@ -18,6 +41,8 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class Token(BaseModel):
@@ -30,6 +55,7 @@ class AuthorSchema(BaseModel):
 
     @validator('name')
     def sanitize_string(cls, v):
+        reject_nul(v)
         # Remove todos os espaços em branco do início e do final
         v = v.strip()
         # Remove interrogação e exclamação
@@ -49,6 +75,8 @@ class AuthorPublic(BaseModel):
 
 class AuthorList(BaseModel):
     authors: list[AuthorSchema]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class BookSchema(BaseModel):
@@ -67,3 +95,110 @@ class BookPublic(BaseModel):
 
 class BookList(BaseModel):
     books: list[BookSchema]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class BookWithAuthor(BookSchema):
+    author: AuthorPublic
+
+
+class BookListWithAuthor(BaseModel):
+    books: list[BookWithAuthor]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class AuthorWithBooks(AuthorPublic):
+    books: list[BookPublic]
+
+
+class BookSearchResult(BaseModel):
+    id: int
+    title: str
+    year: int
+    author_id: int
+    author: str
+    rank: float
+
+
+class SearchResults(BaseModel):
+    results: list[BookSearchResult]
+    next_cursor: str | None = None
+
+
+class BulkBookRow(BaseModel):
+    title: str
+    year: Int4
+    author: str | None = None
+    author_id: Int4 | None = None
+
+    @validator('title', 'author')
+    def check_text(cls, v):
+        return v if v is None else reject_nul(v)
+
+    @model_validator(mode='after')
+    def check_author(self):
+        if not self.author and self.author_id is None:
+            raise ValueError('author or author_id is required')
+
+        return self
+
+
+class BulkError(BaseModel):
+    line: int
+    detail: str
+
+
+class BulkReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[BulkError]
+
+
+class BulkDeleteReport(BaseModel):
+    deleted: int
+
+
+class CatalogTotals(BaseModel):
+    authors: int
+    books: int
+
+
+class YearStats(BaseModel):
+    year: int
+    books: int
+
+
+class YearStatsList(BaseModel):
+    years: list[YearStats]
+
+
+class AuthorStats(BaseModel):
+    author_id: int
+    name: str
+    books: int
+
+
+class AuthorStatsList(BaseModel):
+    authors: list[AuthorStats]
+
+
+class BatchIds(BaseModel):
+    # O limite vale durante a validação, sem montar a lista inteira antes
+    ids: list[Int4] = Field(max_length=settings.BATCH_MAX_IDS)
+
+
+class BookBatch(BaseModel):
+    books: list[BookPublic | None]
+    missing: list[int]
+
+
+class AuthorBatch(BaseModel):
+    authors: list[AuthorPublic | None]
+    missing: list[int]
+
+
+class UserBatch(BaseModel):
+    users: list[UserPublic | None]
+    missing: list[int]
@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime, timedelta
 from http import HTTPStatus
 
@@ -7,8 +8,10 @@ from jwt import decode, encode
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from pwdlib import PasswordHash
 from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
 from zoneinfo import ZoneInfo
 
+from madr.cache import cache_bus, make_cache
 from madr.database import get_session
 from madr.models import User
 from madr.settings import Settings
@@ -16,6 +19,14 @@ from madr.settings import Settings
 pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 settings = Settings()
+user_cache = make_cache(
+    'users',
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+# Muda a cada invalidação. É uma só para todos os usuários: o token traz o
+# email, e o id só é conhecido depois do SELECT
+USERS_GENERATION = 'generation:users'
 
 
 def get_password_hash(password: str):
@@ -41,7 +52,49 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_current_user(
+def token_digest(token: str):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def _discard_user(user_id: int):
+    # A geração muda antes: um snapshot lido antes disso não fica no cache
+    await user_cache.incr(USERS_GENERATION)
+    await user_cache.invalidate(f'user:{user_id}')
+
+
+cache_bus.register('users', _discard_user)
+
+
+async def invalidate_user_cache(user_id: int):
+    await cache_bus.publish('users', user_id)
+
+
+def _user_snapshot(user: User):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at,
+    }
+
+
+async def _user_from_snapshot(session, cached: dict):
+    # Reconstrói o usuário como se tivesse vindo do banco, sem emitir SELECT.
+    # O hash da senha não vai para o cache: fica adiado, como na consulta
+    user = User(
+        username=cached['username'], password=None, email=cached['email']
+    )
+    del user.password
+    user.id = cached['id']
+    user.created_at = cached['created_at']
+    user.updated_at = cached['updated_at']
+    make_transient_to_detached(user)
+
+    return await session.merge(user, load=False)
+
+
+async def get_current_user(
     session=Depends(get_session), token: str = Depends(oauth2_scheme)
 ):
     credentials_exception = HTTPException(
@@ -49,6 +102,12 @@ def get_current_user(
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
+    digest = token_digest(token)
+    cached = await user_cache.get(digest)
+
+    if cached:
+        return await _user_from_snapshot(session, cached)
+
     try:
         payload = decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -63,9 +122,24 @@ def get_current_user(
     except PyJWTError:
         raise credentials_exception
 
-    user = session.scalar(select(User).where(User.email == username))
+    generation = await user_cache.get_many([USERS_GENERATION])
+    user = await session.scalar(select(User).where(User.email == username))
 
     if not user:
         raise credentials_exception
 
+    if generation is None:
+        return user
+
+    await user_cache.set(
+        digest,
+        _user_snapshot(user),
+        expires_at=payload['exp'],
+        tags=(f'user:{user.id}',),
+    )
+    # Uma invalidação entre o SELECT e o set pode ter chegado antes da
+    # entrada; conferir depois do set fecha a janela
+    if await user_cache.get_many([USERS_GENERATION]) != generation:
+        await user_cache.delete(digest)
+
     return user
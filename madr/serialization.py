@@ -0,0 +1,83 @@
+from functools import cache
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from madr.settings import Settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+settings = Settings()
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada pelo orjson, se instalado, ou pelo
+    serializador compilado do pydantic-core."""
+
+    render = staticmethod(dumps)
+
+
+def default_response_class():
+    return FastJSONResponse if settings.FAST_JSON_ENABLED else JSONResponse
+
+
+@cache
+def _dumper(schema: type[BaseModel]):
+    # Lê os campos do schema direto do objeto ORM; campos que são outro
+    # schema (ex.: BookWithAuthor.author) viram um dict aninhado
+    fields = []
+    for name, field in schema.model_fields.items():
+        nested = field.annotation
+        if isinstance(nested, type) and issubclass(nested, BaseModel):
+            fields.append((name, _dumper(nested)))
+        else:
+            fields.append((name, None))
+
+    def dump(row):
+        data = {}
+        for name, nested in fields:
+            value = getattr(row, name)
+            data[name] = nested(value) if nested else value
+
+        return data
+
+    return dump
+
+
+def dump_rows(schema: type[BaseModel], rows) -> list[dict]:
+    return list(map(_dumper(schema), rows))
+
+
+def page_response(
+    response: Response, page: dict, key: str, schema: type[BaseModel]
+):
+    """Serializa uma página de objetos ORM sem validá-los com o pydantic.
+
+    Os dados vieram do próprio banco, então a validação dos campos (como o
+    `EmailStr`) e a do `response_model` são puladas. Os cabeçalhos já
+    definidos na `response` da rota (ex.: X-Total-Count) são mantidos.
+    """
+    content = {**page, key: dump_rows(schema, page[key])}
+
+    return FastJSONResponse(content, headers=dict(response.headers))
+
+
+def fields_response(response: Response, page: dict, key: str, names: list):
+    """Serializa uma página de Rows projetadas com apenas `names`."""
+    rows = [{name: getattr(row, name) for name in names} for row in page[key]]
+
+    return FastJSONResponse(
+        {**page, key: rows}, headers=dict(response.headers)
+    )
@@ -0,0 +1,130 @@
+"""Servidor de produção: `python -m madr.serve`.
+
+Sobe o uvicorn com vários workers, uvloop e httptools (quando
+instalados) e os ajustes de keep-alive, backlog, concorrência e
+reciclagem de workers definidos nas settings `SERVER_*`.
+
+Com mais de um worker, os caches locais de cada processo só ficam
+coerentes com `CACHE_REDIS_URL` configurada (cache compartilhado ou
+invalidações por pub/sub).
+"""
+
+import argparse
+import importlib.util
+import inspect
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from madr.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+
+def cpu_count():
+    # Respeita a afinidade de CPU do processo (taskset, cpusets do container)
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def _installed(module: str):
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count(requested: int | None = None):
+    # Sem Redis, um usuário apagado ou alterado continuaria autenticado nos
+    # outros workers até o cache expirar
+    workers = requested or settings.SERVER_WORKERS
+    if settings.CACHE_REDIS_URL:
+        return workers or cpu_count()
+
+    if workers and workers > 1:
+        raise SystemExit(
+            'More than one worker requires CACHE_REDIS_URL: the in-memory '
+            'caches are not invalidated across processes without it'
+        )
+
+    if not workers and cpu_count() > 1:
+        logger.warning('CACHE_REDIS_URL is not set; starting a single worker')
+
+    return 1
+
+
+def server_options(**overrides):
+    options = {
+        'host': settings.SERVER_HOST,
+        'port': settings.SERVER_PORT,
+        'workers': worker_count(overrides.pop('workers', None)),
+        'loop': 'uvloop' if _installed('uvloop') else 'asyncio',
+        'http': 'httptools' if _installed('httptools') else 'h11',
+        'timeout_keep_alive': settings.SERVER_KEEP_ALIVE_SECONDS,
+        'backlog': settings.SERVER_BACKLOG,
+        'limit_concurrency': settings.SERVER_LIMIT_CONCURRENCY,
+        'limit_max_requests': settings.SERVER_MAX_REQUESTS,
+        'timeout_graceful_shutdown': settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        'access_log': settings.SERVER_ACCESS_LOG,
+        'proxy_headers': True,
+        'forwarded_allow_ips': settings.SERVER_FORWARDED_ALLOW_IPS,
+    }
+
+    # Versões recentes do uvicorn espalham a reciclagem dos workers; sem
+    # isso, todos reiniciam juntos depois do mesmo número de requisições
+    parameters = inspect.signature(uvicorn.Config).parameters
+    if 'limit_max_requests_jitter' in parameters:
+        options['limit_max_requests_jitter'] = (
+            settings.SERVER_MAX_REQUESTS_JITTER
+        )
+
+    options.update({k: v for k, v in overrides.items() if v is not None})
+
+    # Com um só worker o uvicorn roda sem supervisor: atingido o limite, o
+    # servidor encerra em vez de reciclar o processo
+    if options['workers'] <= 1 and options['limit_max_requests']:
+        logger.warning(
+            'SERVER_MAX_REQUESTS is ignored with a single worker: there is '
+            'no supervisor to start a new one'
+        )
+        options['limit_max_requests'] = None
+
+    return options
+
+
+def prepare_metrics_dir(workers: int):
+    # Os workers somam as métricas pelos snapshots gravados no diretório;
+    # arquivos de uma execução anterior não podem entrar na soma
+    if not settings.METRICS_ENABLED or workers <= 1:
+        return None
+
+    directory = settings.METRICS_DIR or tempfile.mkdtemp(
+        prefix='madr-metrics-'
+    )
+    for path in Path(directory).glob('metrics-*'):
+        path.unlink()
+
+    os.environ['METRICS_DIR'] = directory
+    return directory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m madr.serve')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args(argv)
+
+    options = server_options(
+        host=args.host, port=args.port, workers=args.workers
+    )
+    prepare_metrics_dir(options['workers'])
+
+    uvicorn.run('madr.app:app', **options)
+
+
+if __name__ == '__main__':
+    main()
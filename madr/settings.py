@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,66 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    USER_CACHE_MAXSIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 300
+
+    INTERNAL_ADMIN_EMAILS: list[str] = []
+
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    BULK_BATCH_SIZE: int = 1000
+    BULK_MAX_ERRORS: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+    BATCH_MAX_IDS: int = 200
+
+    FAST_JSON_ENABLED: bool = False
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list[str] = ['zstd', 'br', 'gzip']
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    TOTAL_COUNT_CACHE_MAXSIZE: int = 1024
+    TOTAL_COUNT_CACHE_TTL_SECONDS: int = 5
+
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_MAXSIZE: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_CONTROL: str = 'no-cache'
+    RESPONSE_CACHE_MAX_BODY_BYTES: int = 1024 * 1024
+
+    CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    CACHE_REDIS_URL: str | None = None
+    CACHE_REDIS_POOL_SIZE: int = 10
+    CACHE_REDIS_TIMEOUT_SECONDS: float = 0.5
+
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_KEEP_ALIVE_SECONDS: int = 75
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    SERVER_MAX_REQUESTS: int | None = None
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = True
+    SERVER_FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+
+    METRICS_ENABLED: bool = False
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 5
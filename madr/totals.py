@@ -0,0 +1,70 @@
+from typing import Literal
+
+from sqlalchemy import func, select, text
+
+from madr.cache import make_cache
+from madr.settings import Settings
+
+settings = Settings()
+
+TotalMode = Literal['exact', 'estimate']
+
+total_cache = make_cache(
+    'totals',
+    maxsize=settings.TOTAL_COUNT_CACHE_MAXSIZE,
+    ttl=settings.TOTAL_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+def _cache_key(query):
+    compiled = query.compile()
+    return str(compiled), tuple(sorted(compiled.params.items()))
+
+
+def _estimate(session, query):
+    connection = session.connection()
+
+    if query.whereclause is None:
+        # Lista sem filtro: a estimativa mantida pelo VACUUM/ANALYZE
+        (table,) = query.get_final_froms()
+        reltuples = connection.scalar(
+            text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)'),
+            {'t': table.name},
+        )
+        # -1 enquanto a tabela nunca foi analisada; cai no planner
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    compiled = query.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+async def count_total(session, query, mode: TotalMode):
+    """Total de linhas do `query` filtrado, sem cursor, offset ou limit."""
+    if mode == 'estimate':
+        return await session.run_sync(_estimate, query)
+
+    key = _cache_key(query)
+    total = await total_cache.get(key)
+
+    if total is None:
+        total = await session.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+        await total_cache.set(key, total)
+
+    return total
+
+
+async def page_total(session, response, query, mode: TotalMode | None):
+    if mode is None:
+        return None
+
+    total = await count_total(session, query, mode)
+    response.headers['X-Total-Count'] = str(total)
+
+    return total
@@ -0,0 +1,176 @@
+"""catalog statistics aggregates
+
+Revision ID: 3b9e1f6a7c52
+Revises: e7a2c5d18b40
+Create Date: 2026-10-18 15:06:48.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1f6a7c52'
+down_revision: Union[str, None] = 'e7a2c5d18b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('catalog_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('authors', sa.Integer(), nullable=False),
+    sa.Column('books', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('book_year_stats',
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('books', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('year')
+    )
+    op.create_table('author_book_stats',
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('books', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('author_id')
+    )
+    op.create_index('ix_author_book_stats_books', 'author_book_stats', ['books', 'author_id'], unique=False)
+    # Bloqueia escritas até o commit: triggers e carga inicial consistentes
+    op.execute('LOCK TABLE authors, books IN SHARE MODE')
+    op.execute("""
+    CREATE OR REPLACE FUNCTION books_stats_apply(
+        years integer[], author_ids integer[], deltas integer[]
+    )
+    RETURNS void AS $$
+    BEGIN
+        IF deltas IS NULL THEN
+            RETURN;
+        END IF;
+
+        INSERT INTO book_year_stats AS s (year, books)
+        SELECT year, sum(delta) FROM unnest(years, deltas) AS d(year, delta)
+        GROUP BY year ORDER BY year
+        ON CONFLICT (year) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM book_year_stats WHERE year = ANY(years) AND books = 0;
+
+        INSERT INTO author_book_stats AS s (author_id, books)
+        SELECT author_id, sum(delta)
+        FROM unnest(author_ids, deltas) AS d(author_id, delta)
+        GROUP BY author_id ORDER BY author_id
+        ON CONFLICT (author_id) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM author_book_stats
+        WHERE author_id = ANY(author_ids) AND books = 0;
+
+        UPDATE catalog_stats
+        SET books = books + (SELECT sum(delta) FROM unnest(deltas) AS delta)
+        WHERE id = 1;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION books_stats_update()
+    RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(1)
+            ) FROM new_rows;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(-1)
+            ) FROM old_rows;
+        ELSE
+            PERFORM books_stats_apply(
+                array_agg(year), array_agg(author_id), array_agg(delta)
+            ) FROM (
+                SELECT o.year, o.author_id, -1 AS delta
+                FROM old_rows o JOIN new_rows n USING (id)
+                WHERE (o.year, o.author_id) IS DISTINCT FROM
+                    (n.year, n.author_id)
+                UNION ALL
+                SELECT n.year, n.author_id, 1
+                FROM old_rows o JOIN new_rows n USING (id)
+                WHERE (o.year, o.author_id) IS DISTINCT FROM
+                    (n.year, n.author_id)
+            ) AS changed;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER books_stats_insert_trigger
+    AFTER INSERT ON books REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """)
+    op.execute("""
+    CREATE TRIGGER books_stats_update_trigger
+    AFTER UPDATE ON books
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """)
+    op.execute("""
+    CREATE TRIGGER books_stats_delete_trigger
+    AFTER DELETE ON books REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION books_stats_update()
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION authors_stats_update()
+    RETURNS trigger AS $$
+    DECLARE
+        delta integer;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT count(*) INTO delta FROM new_rows;
+        ELSE
+            SELECT -count(*) INTO delta FROM old_rows;
+        END IF;
+
+        IF delta <> 0 THEN
+            UPDATE catalog_stats SET authors = authors + delta WHERE id = 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER authors_stats_insert_trigger
+    AFTER INSERT ON authors REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_stats_update()
+    """)
+    op.execute("""
+    CREATE TRIGGER authors_stats_delete_trigger
+    AFTER DELETE ON authors REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION authors_stats_update()
+    """)
+    # Preenche os agregados com o estado atual
+    op.execute("""
+    INSERT INTO catalog_stats (id, authors, books)
+    SELECT 1, (SELECT count(*) FROM authors), (SELECT count(*) FROM books)
+    """)
+    op.execute("""
+    INSERT INTO book_year_stats (year, books)
+    SELECT year, count(*) FROM books GROUP BY year
+    """)
+    op.execute("""
+    INSERT INTO author_book_stats (author_id, books)
+    SELECT author_id, count(*) FROM books GROUP BY author_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER authors_stats_delete_trigger ON authors')
+    op.execute('DROP TRIGGER authors_stats_insert_trigger ON authors')
+    op.execute('DROP FUNCTION authors_stats_update()')
+    op.execute('DROP TRIGGER books_stats_delete_trigger ON books')
+    op.execute('DROP TRIGGER books_stats_update_trigger ON books')
+    op.execute('DROP TRIGGER books_stats_insert_trigger ON books')
+    op.execute('DROP FUNCTION books_stats_update()')
+    op.execute(
+        'DROP FUNCTION books_stats_apply(integer[], integer[], integer[])'
+    )
+    op.drop_index('ix_author_book_stats_books', table_name='author_book_stats')
+    op.drop_table('author_book_stats')
+    op.drop_table('book_year_stats')
+    op.drop_table('catalog_stats')
@@ -0,0 +1,76 @@
+"""books full-text search vector
+
+Revision ID: 5f3b9d0e7c21
+Revises: 82ca41a27447
+Create Date: 2026-10-18 10:03:17.220945
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9d0e7c21'
+down_revision: Union[str, None] = '82ca41a27447'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'books',
+        sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute("""
+    CREATE OR REPLACE FUNCTION books_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(
+            to_tsvector('simple', coalesce(NEW.title, '')), 'A'
+        ) || setweight(to_tsvector('simple', coalesce(
+            (SELECT name FROM authors WHERE id = NEW.author_id), ''
+        )), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER books_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author_id ON books
+    FOR EACH ROW EXECUTE FUNCTION books_search_vector_update()
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION authors_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE books SET title = title WHERE author_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER authors_search_vector_trigger
+    AFTER UPDATE OF name ON authors
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION authors_search_vector_update()
+    """)
+    # Preenche as linhas existentes disparando o trigger
+    op.execute('UPDATE books SET title = title')
+    op.create_index(
+        'ix_books_search_vector',
+        'books',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.execute('DROP TRIGGER authors_search_vector_trigger ON authors')
+    op.execute('DROP FUNCTION authors_search_vector_update()')
+    op.execute('DROP TRIGGER books_search_vector_trigger ON books')
+    op.execute('DROP FUNCTION books_search_vector_update()')
+    op.drop_column('books', 'search_vector')
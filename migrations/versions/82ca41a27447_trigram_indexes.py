@@ -0,0 +1,41 @@
+"""trigram indexes on books.title and authors.name
+
+Revision ID: 82ca41a27447
+Revises: 96f0ca27c7a7
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82ca41a27447'
+down_revision: Union[str, None] = '96f0ca27c7a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_books_title_trgm',
+        'books',
+        ['title'],
+        postgresql_using='gin',
+        postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_authors_name_trgm',
+        'authors',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_authors_name_trgm', table_name='authors')
+    op.drop_index('ix_books_title_trgm', table_name='books')
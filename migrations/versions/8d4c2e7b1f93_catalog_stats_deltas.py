@@ -0,0 +1,171 @@
+"""catalog statistics as delta rows
+
+Revision ID: 8d4c2e7b1f93
+Revises: 3b9e1f6a7c52
+Create Date: 2026-10-18 21:12:05.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4c2e7b1f93'
+down_revision: Union[str, None] = '3b9e1f6a7c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Uma linha por statement em vez do UPDATE na linha id = 1, que
+    # serializava todas as escritas no catálogo até o commit
+    op.execute('LOCK TABLE authors, books IN SHARE MODE')
+    op.alter_column('catalog_stats', 'id', type_=sa.BigInteger())
+    op.execute('ALTER SEQUENCE catalog_stats_id_seq AS bigint')
+    # A linha id = 1 foi inserida sem usar a sequência
+    op.execute("""
+    SELECT setval('catalog_stats_id_seq', (SELECT max(id) FROM catalog_stats))
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION catalog_stats_add(
+        authors_delta integer, books_delta integer
+    )
+    RETURNS void AS $$
+    DECLARE
+        delta_id bigint;
+    BEGIN
+        INSERT INTO catalog_stats (authors, books)
+        VALUES (authors_delta, books_delta)
+        RETURNING id INTO delta_id;
+
+        -- A cada 1000 linhas, junta em uma as que nenhuma outra transação
+        -- está compactando
+        IF mod(delta_id, 1000) = 0 THEN
+            WITH removed AS (
+                DELETE FROM catalog_stats WHERE id IN (
+                    SELECT id FROM catalog_stats FOR UPDATE SKIP LOCKED
+                )
+                RETURNING authors, books
+            )
+            INSERT INTO catalog_stats (authors, books)
+            SELECT sum(authors), sum(books) FROM removed
+            HAVING count(*) > 0;
+        END IF;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION books_stats_apply(
+        years integer[], author_ids integer[], deltas integer[]
+    )
+    RETURNS void AS $$
+    BEGIN
+        IF deltas IS NULL THEN
+            RETURN;
+        END IF;
+
+        INSERT INTO book_year_stats AS s (year, books)
+        SELECT year, sum(delta) FROM unnest(years, deltas) AS d(year, delta)
+        GROUP BY year ORDER BY year
+        ON CONFLICT (year) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM book_year_stats WHERE year = ANY(years) AND books = 0;
+
+        INSERT INTO author_book_stats AS s (author_id, books)
+        SELECT author_id, sum(delta)
+        FROM unnest(author_ids, deltas) AS d(author_id, delta)
+        GROUP BY author_id ORDER BY author_id
+        ON CONFLICT (author_id) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM author_book_stats
+        WHERE author_id = ANY(author_ids) AND books = 0;
+
+        PERFORM catalog_stats_add(0, sum(delta)::integer)
+        FROM unnest(deltas) AS delta
+        HAVING sum(delta) <> 0;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION authors_stats_update()
+    RETURNS trigger AS $$
+    DECLARE
+        delta integer;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT count(*) INTO delta FROM new_rows;
+        ELSE
+            SELECT -count(*) INTO delta FROM old_rows;
+        END IF;
+
+        IF delta <> 0 THEN
+            PERFORM catalog_stats_add(delta, 0);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute('LOCK TABLE authors, books IN SHARE MODE')
+    op.execute("""
+    CREATE OR REPLACE FUNCTION books_stats_apply(
+        years integer[], author_ids integer[], deltas integer[]
+    )
+    RETURNS void AS $$
+    BEGIN
+        IF deltas IS NULL THEN
+            RETURN;
+        END IF;
+
+        INSERT INTO book_year_stats AS s (year, books)
+        SELECT year, sum(delta) FROM unnest(years, deltas) AS d(year, delta)
+        GROUP BY year ORDER BY year
+        ON CONFLICT (year) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM book_year_stats WHERE year = ANY(years) AND books = 0;
+
+        INSERT INTO author_book_stats AS s (author_id, books)
+        SELECT author_id, sum(delta)
+        FROM unnest(author_ids, deltas) AS d(author_id, delta)
+        GROUP BY author_id ORDER BY author_id
+        ON CONFLICT (author_id) DO UPDATE SET books = s.books + excluded.books;
+        DELETE FROM author_book_stats
+        WHERE author_id = ANY(author_ids) AND books = 0;
+
+        UPDATE catalog_stats
+        SET books = books + (SELECT sum(delta) FROM unnest(deltas) AS delta)
+        WHERE id = 1;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE OR REPLACE FUNCTION authors_stats_update()
+    RETURNS trigger AS $$
+    DECLARE
+        delta integer;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT count(*) INTO delta FROM new_rows;
+        ELSE
+            SELECT -count(*) INTO delta FROM old_rows;
+        END IF;
+
+        IF delta <> 0 THEN
+            UPDATE catalog_stats SET authors = authors + delta WHERE id = 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute('DROP FUNCTION catalog_stats_add(integer, integer)')
+    # Volta à linha única com a soma das variações
+    op.execute("""
+    WITH removed AS (DELETE FROM catalog_stats RETURNING authors, books)
+    INSERT INTO catalog_stats (id, authors, books)
+    SELECT 1, coalesce(sum(authors), 0), coalesce(sum(books), 0)
+    FROM removed
+    """)
+    op.execute("SELECT setval('catalog_stats_id_seq', 1)")
+    op.execute('ALTER SEQUENCE catalog_stats_id_seq AS integer')
+    op.alter_column('catalog_stats', 'id', type_=sa.Integer())
@@ -0,0 +1,33 @@
+"""books author_id on delete cascade
+
+Revision ID: e7a2c5d18b40
+Revises: c4e81a9f2d36
+Create Date: 2026-10-18 14:12:37.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5d18b40'
+down_revision: Union[str, None] = 'c4e81a9f2d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('books_author_id_fkey', 'books', type_='foreignkey')
+    op.create_foreign_key(
+        'books_author_id_fkey', 'books', 'authors',
+        ['author_id'], ['id'], ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('books_author_id_fkey', 'books', type_='foreignkey')
+    op.create_foreign_key(
+        'books_author_id_fkey', 'books', 'authors', ['author_id'], ['id'],
+    )
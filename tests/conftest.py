@@ -1,14 +1,24 @@
+import asyncio
+
 import factory.fuzzy
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 from testcontainers.postgres import PostgresContainer
 
 from madr.app import app
-from madr.database import get_session
+from madr.database import (
+    ThreadedSession,
+    get_read_session_factory,
+    get_session,
+)
 from madr.models import Author, Book, User, table_registry
-from madr.security import get_password_hash
+from madr.response_cache import response_cache
+from madr.security import get_password_hash, user_cache
+from madr.totals import total_cache
 
 
 class UserFactory(factory.Factory):
@@ -36,18 +46,80 @@ class BookFactory(factory.Factory):
     author_id = factory.SubFactory(AuthorFactory)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    async def clear():
+        await user_cache.clear()
+        await total_cache.clear()
+        await response_cache.clear()
+
+    asyncio.run(clear())
+    yield
+    asyncio.run(clear())
+
+
 @pytest.fixture
-def client(session):
+def client(session, engine):
     def get_session_override():
-        return session
+        return ThreadedSession(session)
+
+    def get_read_session_factory_override():
+        return lambda: ThreadedSession(Session(engine))
+
+    with TestClient(app) as client:
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session_factory] = (
+            get_read_session_factory_override
+        )
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def async_client(session, engine):
+    async_engine = create_async_engine(engine.url, poolclass=NullPool)
+
+    async def get_session_override():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as async_session:
+            yield async_session
+
+    def get_read_session_factory_override():
+        return lambda: AsyncSession(async_engine)
 
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session_factory] = (
+            get_read_session_factory_override
+        )
         yield client
 
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def statements(client, engine):
+    """SQL emitido pelas rotas, com sessões configuradas como em produção."""
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    async def get_session_override():
+        session = ThreadedSession(Session(engine, expire_on_commit=False))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app.dependency_overrides[get_session] = get_session_override
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
@@ -130,3 +202,11 @@ def token(client, user):
     data = {'username': user.email, 'password': user.clean_password}
     response = client.post('auth/token', data=data)
     return response.json()['access_token']
+
+
+@pytest.fixture
+def admin_token(token, user, monkeypatch):
+    monkeypatch.setattr(
+        'madr.routers.internal.settings.INTERNAL_ADMIN_EMAILS', [user.email]
+    )
+    return token
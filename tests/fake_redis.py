@@ -0,0 +1,177 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+def _encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        return b'+%b\r\n' % value.encode()
+    if isinstance(value, bytes):
+        return b'$%d\r\n%b\r\n' % (len(value), value)
+    if isinstance(value, Exception):
+        return b'-ERR %b\r\n' % str(value).encode()
+
+    return b'*%d\r\n%b' % (len(value), b''.join(map(_encode, value)))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+
+        args = []
+        for _ in range(int(header[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+
+        return args
+
+    def handle(self):
+        self.queue = None
+        while (command := self.read_command()) is not None:
+            name, *args = command
+            reply = self.server.transact(self, name.decode().upper(), args)
+            if reply is not _NO_REPLY:
+                self.send(_encode(reply))
+
+    def send(self, data: bytes):
+        with self.server.lock:
+            self.wfile.write(data)
+
+    def finish(self):
+        with self.server.lock:
+            for handlers in self.server.subscribers.values():
+                if self in handlers:
+                    handlers.remove(self)
+        super().finish()
+
+
+_NO_REPLY = object()
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Servidor RESP em memória, com o subconjunto de comandos do MADR."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.lock = threading.RLock()
+        self.data = {}
+        self.subscribers = {}
+        self.commands = []
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'redis://{host}:{port}/0'
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+
+        return value
+
+    def transact(self, handler, name, args):
+        if name == 'MULTI':
+            handler.queue = []
+            return 'OK'
+        if name == 'EXEC':
+            queue, handler.queue = handler.queue, None
+            with self.lock:
+                self.commands.append(name)
+                return [self.execute(handler, *command) for command in queue]
+        if handler.queue is not None:
+            handler.queue.append((name, args))
+            return 'QUEUED'
+
+        return self.execute(handler, name, args)
+
+    def execute(self, handler, name, args):  # noqa: PLR0911, PLR0912
+        with self.lock:
+            self.commands.append(name)
+
+            if name in {'PING', 'SELECT', 'AUTH'}:
+                return 'OK'
+            if name == 'GET':
+                return self._get(args[0])
+            if name == 'MGET':
+                return [self._get(key) for key in args]
+            if name == 'SET':
+                expires_at = None
+                if len(args) > 2 and args[2].upper() == b'PX':  # noqa: PLR2004
+                    expires_at = time.time() + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires_at)
+                return 'OK'
+            if name == 'DEL':
+                return sum(
+                    self.data.pop(key, None) is not None for key in args
+                )
+            if name == 'INCR':
+                value = int(self._get(args[0]) or 0) + 1
+                self.data[args[0]] = (str(value).encode(), None)
+                return value
+            if name == 'SADD':
+                members = self._get(args[0]) or set()
+                members.update(args[1:])
+                self.data[args[0]] = (
+                    members,
+                    self.data.get(args[0], (0, None))[1],
+                )
+                return len(args) - 1
+            if name == 'SMEMBERS':
+                return sorted(self._get(args[0]) or set())
+            if name == 'PEXPIRE':
+                if self._get(args[0]) is None:
+                    return 0
+                value, current = self.data[args[0]]
+                expires_at = time.time() + int(args[1]) / 1000
+                option = args[2].upper() if len(args) > 2 else None  # noqa: PLR2004
+                if (option == b'NX' and current is not None) or (
+                    option == b'GT'
+                    and (current is None or expires_at <= current)
+                ):
+                    return 0
+                self.data[args[0]] = (value, expires_at)
+                return 1
+            if name == 'PERSIST':
+                if self._get(args[0]) is None:
+                    return 0
+                self.data[args[0]] = (self.data[args[0]][0], None)
+                return 1
+            if name == 'SCAN':
+                pattern = args[2].decode()
+                keys = [
+                    k
+                    for k in self.data
+                    if fnmatch.fnmatch(k.decode(), pattern)
+                ]
+                return [b'0', keys]
+            if name == 'PUBLISH':
+                receivers = self.subscribers.get(args[0], [])
+                for receiver in receivers:
+                    receiver.send(_encode([b'message', args[0], args[1]]))
+                return len(receivers)
+            if name == 'SUBSCRIBE':
+                self.subscribers.setdefault(args[0], []).append(handler)
+                handler.send(_encode([b'subscribe', args[0], 1]))
+                return _NO_REPLY
+
+            return RuntimeError(f'unknown command {name}')
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
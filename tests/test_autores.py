@@ -1,6 +1,10 @@
 from http import HTTPStatus
 
-from tests.conftest import AuthorFactory
+import pytest
+from sqlalchemy import func, select
+
+from madr.models import Book
+from tests.conftest import AuthorFactory, BookFactory
 
 
 def test_create_author(client, token):
@@ -68,6 +72,51 @@ def test_delete_author(session, client, token):
     }
 
 
+def test_delete_author_cascades_to_books(
+    session, client, author, token, statements
+):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f'/authors/{author.id}'
+    client.delete('/authors/999', headers=headers)  # aquece o cache
+    statements.clear()
+
+    response = client.delete(url, headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [s.split()[0] for s in statements] == ['DELETE']
+    assert session.scalar(select(func.count()).select_from(Book)) == 0
+
+
+def test_read_author(client, author):
+    response = client.get(f'/authors/{author.id}')
+
+    assert response.json() == {'id': author.id, 'name': author.name}
+
+
+def test_read_author_not_found(client):
+    response = client.get('/authors/10')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize('size', [1, 10])
+def test_read_author_include_books(session, client, author, statements, size):
+    books = BookFactory.create_batch(size, author_id=author.id)
+    session.add_all(books)
+    session.commit()
+    url = f'/authors/{author.id}?include=books'
+    expected_ids = [book.id for book in books]
+    expected_statements = 2
+    statements.clear()
+
+    response = client.get(url)
+
+    assert [book['id'] for book in response.json()['books']] == expected_ids
+    assert len(statements) == expected_statements
+
+
 def test_delete_author_error(client, token):
     response = client.delete(
         f'/authors/{10}', headers={'Authorization': f'Bearer {token}'}
@@ -103,3 +152,134 @@ def test_patch_author(session, client, author, token):
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json()['name'] == 'william shakespeare'
+
+
+def test_list_authors_filter_name_is_case_insensitive(session, client):
+    session.bulk_save_objects([
+        AuthorFactory(name='machado de assis'),
+        AuthorFactory(name='jorge amado'),
+    ])
+    session.commit()
+
+    response = client.get('/authors/?name=MACHADO')
+
+    assert response.json() == {
+        'authors': [{'name': 'machado de assis'}],
+        'next_cursor': None,
+        'total': None,
+    }
+
+
+def test_list_authors_cursor_pagination(session, client):
+    session.add_all([AuthorFactory(name=name) for name in ('a', 'b', 'c')])
+    session.commit()
+
+    first = client.get('/authors/?limit=2').json()
+    second = client.get(f'/authors/?limit=2&cursor={first["next_cursor"]}')
+
+    assert [a['name'] for a in first['authors']] == ['a', 'b']
+    assert second.json() == {
+        'authors': [{'name': 'c'}],
+        'next_cursor': None,
+        'total': None,
+    }
+
+
+def test_bulk_create_authors(session, client, token):
+    session.add(AuthorFactory(name='jorge amado'))
+    session.commit()
+
+    response = client.post(
+        '/authors/bulk',
+        content='name\nClarice Lispector?\nJorge  Amado\nclarice lispector\n',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv',
+        },
+    )
+
+    assert response.json() == {
+        'inserted': 1,
+        'failed': 2,
+        'errors': [
+            {'line': 3, 'detail': 'Author is already included in MADR!'},
+            {'line': 4, 'detail': 'Author is already included in MADR!'},
+        ],
+    }
+    assert client.get('/authors/?name=clarice').json()['authors'] == [
+        {'name': 'clarice lispector'}
+    ]
+
+
+def test_bulk_create_authors_rejects_nul(client, token):
+    response = client.post(
+        '/authors/bulk',
+        content='{"name": "nu\\u0000lo"}\n{"name": "valido"}',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'inserted': 1,
+        'failed': 1,
+        'errors': [
+            {
+                'line': 1,
+                'detail': 'name: Value error, must not contain NUL characters',
+            }
+        ],
+    }
+
+
+def test_bulk_create_authors_requires_token(client):
+    response = client.post('/authors/bulk', content='{"name": "x"}')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_export_authors(client, author):
+    response = client.get('/authors/export')
+
+    assert response.json() == {'id': author.id, 'name': author.name}
+
+
+def test_list_authors_exact_total(session, client):
+    session.add_all([
+        AuthorFactory(name='ana'),
+        AuthorFactory(name='mariana'),
+        AuthorFactory(name='bia'),
+    ])
+    session.commit()
+    expected_total = 2
+
+    response = client.get('/authors/?name=ana&limit=1&total=exact')
+
+    assert response.json()['total'] == expected_total
+
+
+def test_batch_get_authors(session, client):
+    session.add_all(AuthorFactory.create_batch(2))
+    session.commit()
+
+    response = client.get('/authors/batch?ids=2,5,1')
+
+    assert [
+        author and author['id'] for author in response.json()['authors']
+    ] == [2, None, 1]
+    assert response.json()['missing'] == [5]
+
+
+def test_list_authors_sparse_fields(session, client):
+    session.add_all(AuthorFactory.create_batch(2))
+    session.commit()
+
+    response = client.get('/authors/?fields=id&limit=1&total=exact')
+
+    assert response.json() == {
+        'authors': [{'id': 1}],
+        'next_cursor': response.json()['next_cursor'],
+        'total': 2,
+    }
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+from madr.queries import encode_cursor
+from tests.conftest import AuthorFactory, BookFactory
+
+
+def test_search_ranks_title_above_author(session, client):
+    machado = AuthorFactory(name='machado de assis')
+    other = AuthorFactory(name='jorge amado')
+    session.add_all([machado, other])
+    session.commit()
+
+    session.add_all([
+        BookFactory(title='Dom Casmurro', author_id=machado.id),
+        BookFactory(title='Machado e outros contos', author_id=other.id),
+        BookFactory(title='Capitães da Areia', author_id=other.id),
+    ])
+    session.commit()
+
+    response = client.get('/search/?q=machado')
+    results = response.json()['results']
+
+    assert response.status_code == HTTPStatus.OK
+    assert [r['title'] for r in results] == [
+        'Machado e outros contos',
+        'Dom Casmurro',
+    ]
+    assert results[1]['author'] == 'machado de assis'
+    assert response.json()['next_cursor'] is None
+
+
+def test_search_follows_author_rename(session, client, author):
+    session.add(BookFactory(title='Quincas Borba', author_id=author.id))
+    session.commit()
+
+    author.name = 'machado de assis'
+    session.commit()
+
+    response = client.get('/search/?q=assis')
+
+    assert [r['title'] for r in response.json()['results']] == [
+        'Quincas Borba'
+    ]
+
+
+def test_search_cursor_pagination(session, client, author):
+    expected_books = 5
+    session.add_all(BookFactory.create_batch(5, author_id=author.id))
+    session.add(BookFactory(title='contos contos', author_id=author.id))
+    session.commit()
+
+    titles = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/search/?q=contos&limit=2&cursor={cursor}')
+        titles += [r['title'] for r in response.json()['results']]
+        cursor = response.json()['next_cursor']
+
+    assert titles[0] == 'contos contos'
+    assert len(set(titles)) == len(titles) == expected_books + 1
+
+
+def test_search_invalid_cursor(client):
+    response = client.get('/search/?q=x&cursor=nope')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_search_cursor_with_invalid_rank(client):
+    cursor = encode_cursor('-rank,id', 'abc', 1)
+
+    response = client.get(f'/search/?q=casmurro&cursor={cursor}')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
@@ -0,0 +1,220 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from freezegun import freeze_time
+
+from madr.cache import (
+    InvalidationBus,
+    MemoryCache,
+    RedisCache,
+    TTLCache,
+)
+from madr.redis_client import RedisClient
+from madr.response_cache import ResponseCache
+from tests.fake_redis import FakeRedis
+
+
+def test_cache_get_and_set():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}
+
+
+def test_cache_evicts_least_recently_used():
+    expected_value = 3
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', expected_value)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == expected_value
+
+
+def test_cache_entry_expires():
+    cache = TTLCache(ttl=60)
+
+    with freeze_time('2023-07-14 12:00:00'):
+        cache.set('a', 1)
+
+    with freeze_time('2023-07-14 12:00:59'):
+        assert cache.get('a') == 1
+
+    with freeze_time('2023-07-14 12:01:00'):
+        assert cache.get('a') is None
+
+
+def test_cache_expires_at_is_capped_by_ttl():
+    cache = TTLCache(ttl=60)
+
+    with freeze_time('2023-07-14 12:00:00') as frozen:
+        cache.set('a', 1, expires_at=frozen().timestamp() + 10)
+
+    with freeze_time('2023-07-14 12:00:10'):
+        assert cache.get('a') is None
+
+
+def test_cache_discard_if():
+    cache = TTLCache()
+    cache.set('a', {'id': 1})
+    cache.set('b', {'id': 2})
+
+    assert cache.discard_if(lambda v: v['id'] == 1) == 1
+    assert cache.get('a') is None
+    assert cache.get('b') == {'id': 2}
+
+
+@pytest.fixture
+def redis_server():
+    with FakeRedis() as server:
+        yield server
+
+
+@pytest.fixture
+def redis_cache(redis_server):
+    return RedisCache(RedisClient(redis_server.url), 'test', ttl=60)
+
+
+def test_memory_cache_tags_and_counters():
+    cache = MemoryCache()
+
+    async def scenario():
+        await cache.set('a', 1, tags=('user:1',))
+        await cache.set('b', 2, tags=('user:2',))
+        await cache.invalidate('user:1')
+        await cache.incr('generation')
+        return (
+            await cache.get('a'),
+            await cache.get('b'),
+            await cache.get_many(['generation', 'other']),
+        )
+
+    assert asyncio.run(scenario()) == (None, 2, [1, 0])
+
+
+def test_redis_cache_round_trip(redis_cache):
+    value = {'id': 1, 'body': b'{}', 'at': datetime(2024, 1, 1)}
+
+    async def scenario():
+        await redis_cache.set(('path', ()), value)
+        return await redis_cache.get(('path', ())), await redis_cache.get('x')
+
+    assert asyncio.run(scenario()) == (value, None)
+    assert redis_cache.stats() == {
+        'backend': 'redis',
+        'hits': 1,
+        'misses': 1,
+        'errors': 0,
+    }
+
+
+def test_redis_cache_respects_expires_at(redis_cache):
+    async def scenario():
+        await redis_cache.set('a', 1, expires_at=time.time() + 0.05)
+        await asyncio.sleep(0.1)
+        return await redis_cache.get('a')
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_redis_cache_tags_counters_and_clear(redis_cache):
+    expected_generation = 2
+
+    async def scenario():
+        await redis_cache.set('a', 1, tags=('user:1',))
+        await redis_cache.set('b', 2, tags=('user:1', 'user:2'))
+        await redis_cache.set('c', 3)
+        removed = await redis_cache.invalidate('user:1')
+        await redis_cache.incr('generation:books')
+        await redis_cache.incr('generation:books')
+        generations = await redis_cache.get_many([
+            'generation:books',
+            'generation:authors',
+        ])
+        cached = await redis_cache.get('c')
+        await redis_cache.clear()
+        return removed, generations, cached, await redis_cache.get('c')
+
+    assert asyncio.run(scenario()) == (2, [expected_generation, 0], 3, None)
+
+
+def test_redis_cache_tag_expiry_is_only_extended(redis_server, redis_cache):
+    async def scenario():
+        await redis_cache.set('a', 1, tags=('user:1',))
+        await redis_cache.set('b', 2, ttl=0.05, tags=('user:1',))
+        await asyncio.sleep(0.1)
+        return await redis_cache.invalidate('user:1')
+
+    # O conjunto ainda guarda 'a', apesar da validade curta de 'b'
+    assert asyncio.run(scenario()) == len(['a', 'b'])
+    assert asyncio.run(redis_cache.get('a')) is None
+
+
+def test_redis_cache_set_is_a_single_transaction(redis_server, redis_cache):
+    asyncio.run(redis_cache.set('a', 1, tags=('user:1',)))
+
+    assert redis_server.commands == [
+        'EXEC', 'SET', 'SADD', 'PEXPIRE', 'PEXPIRE',
+    ]  # fmt: skip
+
+
+def test_redis_cache_degrades_to_miss_when_server_is_down(redis_server):
+    client = RedisClient(redis_server.url, timeout=0.1)
+    cache = RedisCache(client, 'test')
+    redis_server.shutdown()
+    redis_server.server_close()
+
+    async def scenario():
+        await cache.set('a', 1)
+        return await cache.get('a'), await cache.get_many(['generation'])
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert cache.stats()['errors'] > 0
+
+
+def test_invalidation_is_broadcast_to_other_processes(redis_server):
+    local, remote = MemoryCache(), MemoryCache()
+    publisher = InvalidationBus(RedisClient(redis_server.url))
+    subscriber = InvalidationBus(RedisClient(redis_server.url))
+    publisher.register('users', local.invalidate)
+    subscriber.register('users', remote.invalidate)
+
+    async def scenario():
+        for cache in (local, remote):
+            await cache.set('token', {'id': 1}, tags=('user:1',))
+
+        listener = asyncio.create_task(subscriber.listen())
+        while not redis_server.subscribers.get(b'madr:invalidate'):
+            await asyncio.sleep(0.01)
+
+        await publisher.publish('users', 'user:1')
+        while not subscriber.received:
+            await asyncio.sleep(0.01)
+
+        listener.cancel()
+        return await local.get('token'), await remote.get('token')
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5)) == (None, None)
+    assert publisher.received == 0
+
+
+def test_response_cache_generations_live_in_the_backend(redis_cache):
+    cache = ResponseCache(redis_cache, 'no-cache', bus=InvalidationBus())
+
+    async def scenario():
+        before = await cache.key('/books/', b'b=2&a=1', ('books',))
+        await cache.invalidate('books')
+        after = await cache.key('/books/', b'a=1&b=2', ('books',))
+        return before, after
+
+    before, after = asyncio.run(scenario())
+
+    assert before == ('/books/', (('a', '1'), ('b', '2')), (0,))
+    assert after == ('/books/', (('a', '1'), ('b', '2')), (1,))
@@ -0,0 +1,136 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from madr.compression import CompressionMiddleware, negotiate, zstandard
+from tests.conftest import BookFactory
+
+
+async def plain(scope, receive, send):
+    size = int(scope['query_string'] or 10)
+    await PlainTextResponse('x' * size)(scope, receive, send)
+
+
+async def streaming(scope, receive, send):
+    async def lines():
+        for i in range(3):
+            yield f'{{"line": {i}}}\n'
+
+    await StreamingResponse(lines())(scope, receive, send)
+
+
+def raw_client(app, **options):
+    return TestClient(CompressionMiddleware(app, **options))
+
+
+@pytest.mark.parametrize(
+    ('header', 'expected'),
+    [
+        ('gzip, deflate', 'gzip'),
+        ('br;q=1.0, gzip;q=0.5', 'gzip'),
+        ('gzip;q=0', None),
+        ('*', 'gzip'),
+        ('identity', None),
+        ('', None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header, ['gzip']) == expected
+
+
+def test_large_responses_are_gzipped():
+    response = raw_client(plain, minimum_size=100).get(
+        '/?2000', headers={'Accept-Encoding': 'gzip'}
+    )
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert int(response.headers['content-length']) < 100  # noqa: PLR2004
+    assert response.text == 'x' * 2000
+
+
+def test_small_responses_are_not_compressed():
+    response = raw_client(plain, minimum_size=100).get(
+        '/?50', headers={'Accept-Encoding': 'gzip'}
+    )
+
+    assert 'content-encoding' not in response.headers
+    assert response.headers['vary'] == 'Accept-Encoding'
+
+
+def test_client_without_gzip_gets_identity():
+    response = raw_client(plain, minimum_size=100).get(
+        '/?2000', headers={'Accept-Encoding': 'identity'}
+    )
+
+    assert 'content-encoding' not in response.headers
+    assert response.text == 'x' * 2000
+
+
+def test_streaming_is_compressed_chunk_by_chunk():
+    chunks = []
+
+    async def app(scope, receive, send):
+        async def record(message):
+            chunks.append(message)
+            await send(message)
+
+        await CompressionMiddleware(streaming, levels={'gzip': 1})(
+            scope, receive, record
+        )
+
+    with TestClient(app).stream(
+        'GET', '/', headers={'Accept-Encoding': 'gzip'}
+    ) as response:
+        text = response.read().decode()
+
+    bodies = [m for m in chunks if m['type'] == 'http.response.body']
+    decompressor = zlib.decompressobj(31)
+
+    assert 'content-length' not in response.headers
+    assert response.headers['content-encoding'] == 'gzip'
+    # Cada pedaço é descomprimível assim que chega
+    assert decompressor.decompress(bodies[0]['body']) == b'{"line": 0}\n'
+    assert text.splitlines() == [f'{{"line": {i}}}' for i in range(3)]
+
+
+def test_export_is_gzipped(session, client, author):
+    session.add_all(BookFactory.create_batch(50, author_id=author.id))
+    session.commit()
+
+    with client.stream(
+        'GET', '/books/export', headers={'Accept-Encoding': 'gzip'}
+    ) as response:
+        raw = b''.join(response.iter_raw())
+
+    lines = gzip.decompress(raw).decode().splitlines()
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(lines) == 50  # noqa: PLR2004
+    assert json.loads(lines[0])['author_id'] == author.id
+
+
+def test_catalog_listing_is_gzipped(session, client, author):
+    session.add_all(BookFactory.create_batch(50, author_id=author.id))
+    session.commit()
+
+    response = client.get(
+        '/books/?limit=50', headers={'Accept-Encoding': 'gzip'}
+    )
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(response.json()['books']) == 50  # noqa: PLR2004
+
+
+@pytest.mark.skipif(zstandard is None, reason='zstandard not installed')
+def test_preferred_encoding_wins():
+    response = raw_client(
+        plain, minimum_size=100, encodings=['zstd', 'gzip']
+    ).get('/?2000', headers={'Accept-Encoding': 'gzip, zstd'})
+
+    assert response.headers['content-encoding'] == 'zstd'
+    assert response.text == 'x' * 2000
@@ -70,7 +70,11 @@ def test_read_users_with_user(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get('/users/')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {
+        'users': [user_schema],
+        'next_cursor': None,
+        'total': None,
+    }
 
     assert response
 
@@ -138,3 +142,43 @@ def test_delete_wrong_user(client, other_user, token):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Não autorizado'}
+
+
+def test_read_users_cursor_pagination(client, user, other_user):
+    response = client.get('/users/?limit=1')
+    cursor = response.json()['next_cursor']
+
+    assert response.json()['users'][0]['id'] == user.id
+
+    response = client.get(f'/users/?limit=1&cursor={cursor}')
+
+    assert response.json()['users'][0]['id'] == other_user.id
+    assert response.json()['next_cursor'] is None
+
+
+def test_read_users_estimated_total(client, user):
+    response = client.get('/users/?total=estimate')
+
+    assert response.headers['X-Total-Count'] == str(response.json()['total'])
+
+
+def test_batch_get_users(client, user):
+    response = client.post('/users/batch', json={'ids': [user.id, 42]})
+
+    assert response.json() == {
+        'users': [
+            {'id': user.id, 'username': user.username, 'email': user.email},
+            None,
+        ],
+        'missing': [42],
+    }
+
+
+def test_read_users_sparse_fields(client, user):
+    response = client.get('/users/?fields=username')
+
+    assert response.json() == {
+        'users': [{'username': user.username}],
+        'next_cursor': None,
+        'total': None,
+    }
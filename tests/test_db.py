@@ -1,6 +1,14 @@
-from sqlalchemy import select
+import asyncio
+from http import HTTPStatus
 
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from madr import database
+from madr.database import RoutingSession, ThreadedSession
 from madr.models import User
+from tests.conftest import BookFactory
 
 
 def test_create_user(session):
@@ -13,3 +21,173 @@ def test_create_user(session):
 
     assert user.username == 'madman'
     assert new_user.username == 'madman'
+
+
+def test_async_session_create_and_list_books(async_client, author, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    json = {'title': 'Async book', 'year': 2024, 'author_id': author.id}
+
+    response = async_client.post('/books/', headers=headers, json=json)
+    assert response.status_code == HTTPStatus.CREATED
+
+    response = async_client.get('/books/?title=Async')
+    assert response.json() == {
+        'books': [json],
+        'next_cursor': None,
+        'total': None,
+    }
+
+
+def test_async_session_create_book_conflicts(async_client, author, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    json = {'title': 'Async book', 'year': 2024, 'author_id': author.id}
+    async_client.post('/books/', headers=headers, json=json)
+
+    response = async_client.post('/books/', headers=headers, json=json)
+    assert response.status_code == HTTPStatus.CONFLICT
+
+    json = {'title': 'Other book', 'year': 2024, 'author_id': author.id + 1}
+    response = async_client.post('/books/', headers=headers, json=json)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_session_update_and_delete_user(async_client, user):
+    data = {'username': user.email, 'password': user.clean_password}
+    token = async_client.post('/auth/token', data=data).json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = async_client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={'username': 'bob', 'email': user.email, 'password': 'new'},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'bob'
+
+    response = async_client.delete(f'/users/{user.id}', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.fixture
+def replica(engine, monkeypatch):
+    # Stand-in de réplica: outro engine para o mesmo banco
+    replica = create_engine(engine.url)
+    replica.statements = []
+
+    @event.listens_for(replica, 'before_cursor_execute')
+    def count(conn, cursor, statement, *args):
+        replica.statements.append(statement)
+
+    monkeypatch.setattr(database, 'replica_engines', [replica])
+    yield replica
+    replica.dispose()
+
+
+def test_list_books_reads_from_replica(client, session, replica, author):
+    session.add(BookFactory(author_id=author.id))
+    session.commit()
+    session.info.clear()
+
+    response = client.get('/books/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['books']) == 1
+    assert any('FROM books' in s for s in replica.statements)
+
+
+def test_writes_stay_on_primary(client, author, token, replica):
+    json = {'title': 'Primary book', 'year': 1995, 'author_id': author.id}
+
+    response = client.post(
+        '/books/', headers={'Authorization': f'Bearer {token}'}, json=json
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert replica.statements == []
+
+
+def test_routing_session_uses_primary_after_write(session, replica):
+    session.info.clear()
+    primary = ThreadedSession(session)
+    routing = RoutingSession(primary, ThreadedSession(Session(replica)))
+
+    assert routing.target is routing.replica
+
+    async def write_then_read():
+        primary.add(User(username='w', password='secret', email='w@foo.com'))
+        await primary.flush()
+        return await routing.scalar(select(User).where(User.username == 'w'))
+
+    user = asyncio.run(write_then_read())
+
+    assert routing.target is primary
+    assert user.email == 'w@foo.com'
+    assert replica.statements == []
+
+
+def test_async_session_bulk_copy(async_client, token):
+    response = async_client.post(
+        '/books/bulk',
+        content='{"title": "Async COPY", "year": 2024, "author": "Fulano"}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.json() == {'inserted': 1, 'failed': 0, 'errors': []}
+
+
+def test_async_session_export_streams(async_client, session, author):
+    expected_lines = 4
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+
+    response = async_client.get('/books/export?format=csv')
+
+    assert len(response.text.splitlines()) == expected_lines
+
+
+def test_write_endpoints_issue_one_statement(
+    client, author, token, statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    # Aquece o cache do usuário autenticado, que evita o SELECT em users
+    client.post('/authors/', headers=headers, json={'name': 'aquecimento'})
+    book = {'title': 'um', 'year': 1, 'author_id': author.id}
+    new_user = {'username': 'a', 'email': 'a@a.com', 'password': 'x'}
+
+    writes = [
+        ('post', '/authors/', {'name': 'novo autor'}),
+        ('patch', f'/authors/{author.id}', {'name': 'outro nome'}),
+        ('post', '/books/', book),
+        ('patch', '/books/1', {**book, 'title': 'dois'}),
+        ('post', '/users/', new_user),
+    ]
+    for method, url, json in writes:
+        statements.clear()
+        response = client.request(method, url, headers=headers, json=json)
+
+        assert response.status_code < HTTPStatus.BAD_REQUEST, url
+        assert len(statements) == 1, statements
+        assert 'RETURNING' in statements[0]
+
+
+def test_update_user_issues_one_statement(client, user, token, statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    json = {'username': 'novo', 'email': 'novo@test.com', 'password': 'x'}
+    client.post('/authors/', headers=headers, json={'name': 'aquecimento'})
+
+    statements.clear()
+    response = client.put(f'/users/{user.id}', headers=headers, json=json)
+
+    assert response.json()['username'] == 'novo'
+    assert len(statements) == 1
+    assert statements[0].startswith('UPDATE users')
+
+
+@pytest.mark.parametrize('mode', ['exact', 'estimate'])
+def test_async_session_list_total(async_client, session, author, mode):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+
+    response = async_client.get(f'/books/?year_min=0&total={mode}')
+
+    assert response.headers['X-Total-Count'] == str(response.json()['total'])
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from madr.models import CatalogStats
+from tests.conftest import AuthorFactory, BookFactory
+
+
+def test_stats_empty_catalog(client):
+    assert client.get('/stats/').json() == {'authors': 0, 'books': 0}
+    assert client.get('/stats/years').json() == {'years': []}
+    assert client.get('/stats/authors').json() == {'authors': []}
+
+
+def test_stats_follow_api_writes(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    author_id = client.post(
+        '/authors/', headers=headers, json={'name': 'machado'}
+    ).json()['id']
+    for title, year in [('a', 1881), ('b', 1881), ('c', 1899)]:
+        client.post(
+            '/books/',
+            headers=headers,
+            json={'title': title, 'year': year, 'author_id': author_id},
+        )
+
+    book = client.get('/books/?title=c').json()['books'][0]
+    client.patch('/books/3', headers=headers, json={**book, 'year': 1881})
+
+    assert client.get('/stats/').json() == {'authors': 1, 'books': 3}
+    assert client.get('/stats/years').json() == {
+        'years': [{'year': 1881, 'books': 3}]
+    }
+    assert client.get('/stats/authors').json() == {
+        'authors': [{'author_id': author_id, 'name': 'machado', 'books': 3}]
+    }
+
+    client.delete(f'/authors/{author_id}', headers=headers)
+
+    assert client.get('/stats/').json() == {'authors': 0, 'books': 0}
+    assert client.get('/stats/years').json() == {'years': []}
+    assert client.get('/stats/authors').json() == {'authors': []}
+
+
+def test_stats_follow_bulk_ingest_and_bulk_delete(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    body = '\n'.join([
+        '{"title": "um", "year": 2001, "author": "ana"}',
+        '{"title": "dois", "year": 2001, "author": "ana"}',
+        '{"title": "tres", "year": 2002, "author": "bia"}',
+    ])
+    client.post('/books/bulk', headers=headers, content=body)
+
+    assert client.get('/stats/').json() == {'authors': 2, 'books': 3}
+    assert client.get('/stats/authors?limit=1').json()['authors'] == [
+        {'author_id': 1, 'name': 'ana', 'books': 2}
+    ]
+
+    response = client.delete('/books/?author_id=1', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert client.get('/stats/years').json() == {
+        'years': [{'year': 2002, 'books': 1}]
+    }
+
+
+def test_stats_ignore_title_only_updates(session, client):
+    author = AuthorFactory()
+    session.add(author)
+    session.flush()
+    book = BookFactory(year=1900, author_id=author.id)
+    session.add(book)
+    session.commit()
+
+    book.title = 'novo titulo'
+    author.name = 'novo nome'
+    session.commit()
+
+    assert client.get('/stats/years').json() == {
+        'years': [{'year': 1900, 'books': 1}]
+    }
+
+
+def test_stats_writes_do_not_wait_for_each_other(session, client, engine):
+    authors = AuthorFactory.create_batch(2)
+    session.add_all(authors)
+    session.commit()
+
+    # Transações abertas ao mesmo tempo, como uma carga em lote e um POST
+    with Session(engine) as first, Session(engine) as second:
+        first.add(BookFactory(year=2001, author_id=authors[0].id))
+        first.flush()
+
+        second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        second.add(AuthorFactory())
+        second.add(BookFactory(year=2002, author_id=authors[1].id))
+        second.commit()
+        first.commit()
+
+    assert client.get('/stats/').json() == {'authors': 3, 'books': 2}
+
+
+def test_stats_rows_are_compacted(session, client):
+    session.add_all(AuthorFactory.create_batch(2))
+    session.commit()
+    session.execute(text("SELECT setval('catalog_stats_id_seq', 999)"))
+    session.add(AuthorFactory())
+    session.commit()
+
+    # A variação de id 1000 junta todas as linhas em uma só
+    assert session.scalar(select(func.count()).select_from(CatalogStats)) == 1
+    assert client.get('/stats/').json() == {'authors': 3, 'books': 0}
@@ -1,8 +1,10 @@
+import json
 from http import HTTPStatus
 
 import pytest
 
-from tests.conftest import BookFactory
+from madr.queries import encode_cursor, settings
+from tests.conftest import AuthorFactory, BookFactory
 
 
 def test_create_book(author, client, token):
@@ -48,6 +50,20 @@ def test_create_book(author, client, token):
 #     assert response.json()['detail'] == 'Book is already included in MADR!'
 
 
+def test_create_book_already_exists(session, client, token, author):
+    session.add(BookFactory(title='livro repetido', author_id=author.id))
+    session.commit()
+
+    response = client.post(
+        '/books/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'livro repetido', 'year': 1995, 'author_id': author.id},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json()['detail'] == 'Book is already included in MADR!'
+
+
 def test_create_book_invalid_author(client, token):
     json = {
         'title': 'Test book',
@@ -176,6 +192,53 @@ def test_delete_book(session, client, author, token):
     }
 
 
+def test_bulk_delete_books_by_author(session, client, token):
+    author, other = AuthorFactory(), AuthorFactory()
+    session.add_all([author, other])
+    session.flush()
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.add(BookFactory(title='fica', author_id=other.id))
+    session.commit()
+    expected_deleted = 3
+
+    response = client.delete(
+        f'/books/?author_id={author.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.json() == {'deleted': expected_deleted}
+    assert client.get('/books/').json()['books'][0]['title'] == 'fica'
+
+
+def test_bulk_delete_books_by_ids(session, client, author, token):
+    books = BookFactory.create_batch(3, author_id=author.id)
+    session.add_all(books)
+    session.commit()
+    expected_deleted = 2
+
+    response = client.delete(
+        f'/books/?id={books[0].id}&id={books[2].id}&id=999',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.json() == {'deleted': expected_deleted}
+    assert client.get('/books/').json()['books'] == [
+        {
+            'title': books[1].title,
+            'year': books[1].year,
+            'author_id': author.id,
+        }
+    ]
+
+
+def test_bulk_delete_books_requires_filter(client, token):
+    response = client.delete(
+        '/books/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 def test_delete_book_error(client, token):
     response = client.delete(
         f'/books/{10}', headers={'Authorization': f'Bearer {token}'}
@@ -217,3 +280,540 @@ def test_patch_book(session, client, author, token):
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json()['title'] == 'teste!'
+
+
+def test_list_books_filter_title_is_case_insensitive(session, client, author):
+    expected_books = 2
+    session.bulk_save_objects([
+        BookFactory(author_id=author.id, title='Dom Casmurro'),
+        BookFactory(author_id=author.id, title='100% Casmurro'),
+    ])
+    session.commit()
+
+    response = client.get('/books/?title=casMURRO')
+    assert len(response.json()['books']) == expected_books
+
+    response = client.get('/books/?title=100%')
+    assert response.json()['books'][0]['title'] == '100% Casmurro'
+    assert len(response.json()['books']) == 1
+
+
+def test_list_books_cursor_pagination(session, client, author):
+    expected_books = 5
+    session.bulk_save_objects(BookFactory.create_batch(5, author_id=author.id))
+    session.commit()
+
+    titles = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/books/?limit=2&cursor={cursor}')
+        titles += [b['title'] for b in response.json()['books']]
+        cursor = response.json()['next_cursor']
+
+    assert titles == sorted(titles, key=lambda t: int(t.split('test')[1]))
+    assert len(titles) == len(set(titles)) == expected_books
+
+
+def test_list_books_invalid_cursor(client):
+    response = client.get('/books/?cursor=bad')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_list_books_filter_author_and_year_range(session, client):
+    first, second = AuthorFactory(), AuthorFactory()
+    session.add_all([first, second])
+    session.commit()
+
+    session.add_all([
+        BookFactory(author_id=first.id, year=1899),
+        BookFactory(author_id=first.id, year=1900),
+        BookFactory(author_id=first.id, year=1950),
+        BookFactory(author_id=second.id, year=1920),
+    ])
+    session.commit()
+
+    response = client.get(
+        f'/books/?author_id={first.id}&year_min=1900&year_max=1960'
+    )
+
+    assert [b['year'] for b in response.json()['books']] == [1900, 1950]
+
+
+def test_list_books_order_by_year_desc_with_cursor(session, client, author):
+    session.add_all([
+        BookFactory(author_id=author.id, year=year)
+        for year in (1990, 1980, 2000, 1980)
+    ])
+    session.commit()
+
+    first = client.get('/books/?order_by=-year&limit=3').json()
+    second = client.get(
+        f'/books/?order_by=-year&limit=3&cursor={first["next_cursor"]}'
+    ).json()
+
+    assert [b['year'] for b in first['books']] == [2000, 1990, 1980]
+    assert [b['year'] for b in second['books']] == [1980]
+    assert second['next_cursor'] is None
+
+
+def test_list_books_cursor_from_other_order_is_rejected(
+    session, client, author
+):
+    session.add_all(BookFactory.create_batch(2, author_id=author.id))
+    session.commit()
+
+    cursor = client.get('/books/?limit=1').json()['next_cursor']
+    response = client.get(f'/books/?order_by=year&cursor={cursor}')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    ('order_by', 'source'), [('-id', 'id'), ('-year', 'year')]
+)
+def test_list_books_cursor_from_reversed_order_is_rejected(
+    session, client, author, order_by, source
+):
+    session.add_all(BookFactory.create_batch(2, author_id=author.id))
+    session.commit()
+
+    cursor = client.get(f'/books/?limit=1&order_by={source}').json()[
+        'next_cursor'
+    ]
+    response = client.get(f'/books/?order_by={order_by}&cursor={cursor}')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    ('order_by', 'values'),
+    [
+        ('id', ['abc']),
+        ('id', [True]),
+        ('id', [2**40]),
+        ('id', [1.5]),
+        ('year', [None, 1]),
+    ],
+)
+def test_list_books_cursor_with_invalid_values(client, order_by, values):
+    cursor = encode_cursor(order_by, *values)
+
+    response = client.get(f'/books/?order_by={order_by}&cursor={cursor}')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_bulk_create_books_ndjson(session, client, token, author):
+    session.add(BookFactory(title='Dom Casmurro', author_id=author.id))
+    session.commit()
+
+    rows = [
+        {
+            'title': 'Memórias Póstumas',
+            'year': 1881,
+            'author': ' Machado  de Assis!',
+        },
+        {'title': 'Quincas Borba', 'year': 1891, 'author': 'machado de assis'},
+        {'title': 'Dom Casmurro', 'year': 1899, 'author_id': author.id},
+        {'title': 'Sem autor', 'year': 1900, 'author_id': 999},
+        {'title': 'Sem ano', 'author': 'x'},
+        'not json',
+        {'title': 'Quincas Borba', 'year': 1891, 'author': 'outro'},
+    ]
+    body = '\n'.join(
+        row if isinstance(row, str) else json.dumps(row) for row in rows
+    )
+
+    response = client.post(
+        '/books/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'inserted': 2,
+        'failed': 5,
+        'errors': [
+            {'line': 3, 'detail': 'Book is already included in MADR!'},
+            {'line': 4, 'detail': 'Author does not exist'},
+            {'line': 5, 'detail': 'year: Field required'},
+            {'line': 6, 'detail': 'Invalid row'},
+            {'line': 7, 'detail': 'Book is already included in MADR!'},
+        ],
+    }
+
+    response = client.get('/books/?title=quincas')
+    author_id = response.json()['books'][0]['author_id']
+    response = client.get(f'/books/?author_id={author_id}')
+
+    assert [b['title'] for b in response.json()['books']] == [
+        'Memórias Póstumas',
+        'Quincas Borba',
+    ]
+
+
+def test_bulk_create_books_csv(client, token, author):
+    invalid_line = 3
+    body = (
+        'title,year,author_id\r\n'
+        f'"Livro, com vírgula",1990,{author.id}\r\n'
+        f'Outro livro,abc,{author.id}\r\n'
+    )
+
+    response = client.post(
+        '/books/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv',
+        },
+    )
+
+    assert response.json()['inserted'] == 1
+    assert response.json()['errors'][0]['line'] == invalid_line
+    assert client.get('/books/?title=vírgula').json()['books'] == [
+        {'title': 'Livro, com vírgula', 'year': 1990, 'author_id': author.id}
+    ]
+
+
+def test_bulk_create_books_reports_unreadable_lines(client, token, author):
+    body = (
+        'title,year,author_id\r\n'
+        f'Primeiro,1990,{author.id}\r\n'
+        f'Segundo,1991,{author.id},extra\r\n'
+    ).encode() + f'Terceiro \xe9,1992,{author.id}\r\n'.encode('latin-1')
+    body += f'Quarto,1993,{author.id}\r\n'.encode()
+
+    response = client.post(
+        '/books/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'text/csv',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'inserted': 2,
+        'failed': 2,
+        'errors': [
+            {'line': 3, 'detail': 'Too many columns'},
+            {'line': 4, 'detail': 'Invalid encoding, expected UTF-8'},
+        ],
+    }
+
+
+def test_bulk_create_books_ndjson_invalid_encoding(client, token, author):
+    row = {'title': 'Válido', 'year': 1990, 'author_id': author.id}
+    body = b'{"title": "\xe9"}\n' + json.dumps(row).encode()
+
+    response = client.post(
+        '/books/bulk',
+        content=body,
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.json() == {
+        'inserted': 1,
+        'failed': 1,
+        'errors': [{'line': 1, 'detail': 'Invalid encoding, expected UTF-8'}],
+    }
+
+
+def test_bulk_create_books_rejects_values_postgres_cannot_store(
+    client, token, author
+):
+    rows = [
+        {'title': 'Grande', 'year': 99999999999, 'author_id': author.id},
+        {'title': 'Autor grande', 'year': 1990, 'author_id': 2**31},
+        {'title': 'Nulo \u0000', 'year': 1990, 'author_id': author.id},
+        {'title': 'Autor nulo', 'year': 1990, 'author': 'a\u0000'},
+        {'title': 'Válido', 'year': 1990, 'author_id': author.id},
+    ]
+
+    response = client.post(
+        '/books/bulk',
+        content='\n'.join(json.dumps(row) for row in rows),
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['inserted'] == 1
+    assert [error['line'] for error in response.json()['errors']] == [
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_export_books_ndjson(session, client, author):
+    books = BookFactory.create_batch(3, author_id=author.id)
+    session.add_all(books)
+    session.commit()
+
+    response = client.get('/books/export')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert lines == [
+        {
+            'id': book.id,
+            'title': book.title,
+            'year': book.year,
+            'author_id': author.id,
+        }
+        for book in books
+    ]
+
+
+def test_export_books_csv(session, client, author):
+    session.add(BookFactory(title='Livro, com vírgula', author_id=author.id))
+    session.commit()
+
+    response = client.get('/books/export?format=csv')
+
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.text.splitlines()[0] == 'id,title,year,author_id'
+    assert '"Livro, com vírgula"' in response.text.splitlines()[1]
+
+
+def test_list_books_include_author(session, client, author):
+    session.add(BookFactory(title='com autor', author_id=author.id))
+    session.commit()
+
+    response = client.get('/books/?include=author')
+
+    assert response.json()['books'] == [
+        {
+            'title': 'com autor',
+            'year': response.json()['books'][0]['year'],
+            'author_id': author.id,
+            'author': {'id': author.id, 'name': author.name},
+        }
+    ]
+
+
+@pytest.mark.parametrize('limit', [2, 20])
+def test_list_books_include_author_single_statement(
+    session, client, statements, limit
+):
+    authors = AuthorFactory.create_batch(20)
+    session.add_all(authors)
+    session.flush()
+    session.add_all([BookFactory(author_id=author.id) for author in authors])
+    session.commit()
+    statements.clear()
+
+    response = client.get(f'/books/?include=author&limit={limit}')
+
+    assert len(response.json()['books']) == limit
+    assert len(statements) == 1
+
+
+def test_list_books_without_include_does_not_load_authors(
+    session, client, author, statements
+):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+    statements.clear()
+
+    response = client.get('/books/')
+
+    assert 'author' not in response.json()['books'][0]
+    assert len(statements) == 1
+
+
+def test_list_books_exact_total_ignores_pagination(session, client, author):
+    session.add_all(BookFactory.create_batch(5, author_id=author.id))
+    session.add(BookFactory(year=3000, author_id=author.id))
+    session.commit()
+    expected_total = 5
+
+    response = client.get('/books/?year_max=2999&limit=2&total=exact')
+    cursor = response.json()['next_cursor']
+    next_page = client.get(
+        f'/books/?year_max=2999&limit=2&total=exact&cursor={cursor}'
+    )
+
+    assert response.json()['total'] == expected_total
+    assert response.headers['X-Total-Count'] == str(expected_total)
+    assert next_page.json()['total'] == expected_total
+
+
+def test_list_books_exact_total_is_cached(session, client, author):
+    session.add(BookFactory(author_id=author.id))
+    session.commit()
+    client.get('/books/?total=exact')
+
+    session.add(BookFactory(author_id=author.id))
+    session.commit()
+
+    assert client.get('/books/?total=exact').json()['total'] == 1
+    assert client.get('/books/?limit=1&total=exact').json()['total'] == 1
+
+
+@pytest.mark.parametrize('query', ['', 'year_min=1&'])
+def test_list_books_estimated_total(session, client, author, query):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+
+    response = client.get(f'/books/?{query}total=estimate')
+
+    assert response.json()['total'] >= 0
+    assert response.headers['X-Total-Count'] == str(response.json()['total'])
+
+
+def test_list_books_without_total(client):
+    response = client.get('/books/')
+
+    assert response.json()['total'] is None
+    assert 'X-Total-Count' not in response.headers
+
+
+def test_read_book(session, client, author):
+    book = BookFactory(title='detalhe', author_id=author.id)
+    session.add(book)
+    session.commit()
+
+    response = client.get(f'/books/{book.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'id': book.id,
+        'title': 'detalhe',
+        'year': book.year,
+        'author_id': author.id,
+    }
+
+
+def test_read_book_not_found(client):
+    response = client.get('/books/1')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Book not found.'}
+
+
+def test_batch_get_books_keeps_request_order(
+    session, client, author, statements
+):
+    books = BookFactory.create_batch(3, author_id=author.id)
+    session.add_all(books)
+    session.commit()
+    first, _, third = (book.id for book in books)
+    statements.clear()
+
+    response = client.get(f'/books/batch?ids={third},999,{first},{third}')
+
+    assert [book and book['id'] for book in response.json()['books']] == [
+        third,
+        None,
+        first,
+        third,
+    ]
+    assert response.json()['missing'] == [999]
+    assert len(statements) == 1
+
+
+def test_batch_get_books_by_body(session, client, author):
+    session.add_all(BookFactory.create_batch(2, author_id=author.id))
+    session.commit()
+
+    response = client.post('/books/batch', json={'ids': [2, 1, 3]})
+
+    assert [book and book['id'] for book in response.json()['books']] == [
+        2,
+        1,
+        None,
+    ]
+    assert response.json()['missing'] == [3]
+
+
+def test_batch_get_books_limits_ids(client, monkeypatch):
+    monkeypatch.setattr('madr.queries.settings.BATCH_MAX_IDS', 2)
+
+    response = client.post('/books/batch', json={'ids': [1, 2, 3]})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Too many ids, the limit is 2'}
+
+
+def test_batch_get_books_rejects_oversized_requests(client):
+    ids = list(range(1, settings.BATCH_MAX_IDS + 2))
+
+    response = client.post('/books/batch', json={'ids': ids})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.get(f'/books/batch?ids={"1," * 10_000}')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_batch_get_books_rejects_ids_out_of_range(client):
+    response = client.get('/books/batch?ids=1,99999999999')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.post('/books/batch', json={'ids': [1, -(2**31) - 1]})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_batch_get_books_invalid_ids(client):
+    response = client.get('/books/batch?ids=1,dois')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid ids'}
+
+
+def test_list_books_sparse_fields(session, client, author, statements):
+    session.add(BookFactory(title='projetado', author_id=author.id))
+    session.commit()
+    statements.clear()
+
+    response = client.get('/books/?fields=id,title')
+
+    assert response.json()['books'] == [{'id': 1, 'title': 'projetado'}]
+    assert 'created_at' not in statements[0]
+    assert 'books.year' not in statements[0]
+
+
+def test_list_books_sparse_fields_keep_cursor(session, client, author):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+
+    first = client.get('/books/?fields=title&order_by=-year&limit=2').json()
+    second = client.get(
+        f'/books/?fields=title&order_by=-year&limit=2'
+        f'&cursor={first["next_cursor"]}'
+    ).json()
+    ordered = client.get('/books/?order_by=-year').json()['books']
+
+    assert [book['title'] for book in first['books'] + second['books']] == [
+        book['title'] for book in ordered
+    ]
+    assert list(first['books'][0]) == ['title']
+
+
+@pytest.mark.parametrize(
+    'query', ['fields=id,created_at', 'fields=', 'fields=id&include=author']
+)
+def test_list_books_invalid_fields(client, query):
+    response = client.get(f'/books/?{query}')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from madr.metrics import Histogram, Metrics, family, merge, metrics, render
+from madr.response_cache import response_cache
+
+COUNT = 'madr_http_request_duration_seconds_count'
+GET = 'method="GET"'
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    monkeypatch.setattr(metrics, 'requests', {})
+
+
+def sample_line(text, prefix):
+    lines = [line for line in text.splitlines() if line.startswith(prefix)]
+    assert lines, prefix
+    return float(lines[0].rsplit(' ', 1)[1])
+
+
+def test_metrics_are_opt_in(client):
+    assert client.get('/metrics').status_code == 404  # noqa: PLR2004
+
+
+def test_requests_are_measured_by_route_template(client, enabled):
+    expected_not_found = 2
+    client.get('/books/1')
+    client.get('/books/2')
+    client.get('/books/')
+
+    response = client.get('/metrics')
+    text = response.text
+
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        sample_line(text, f'{COUNT}{{{GET},route="/books/{{book_id}}",'
+                          'status="404"}')
+        == expected_not_found
+    )  # fmt: skip
+    assert sample_line(text, f'{COUNT}{{{GET},route="/books/",status="200"}}')
+    # A própria requisição do /metrics está em andamento
+    assert sample_line(text, 'madr_http_requests_in_flight') == 1
+
+
+def test_cached_responses_keep_route_label(client, enabled, monkeypatch):
+    expected_requests = 2
+    monkeypatch.setattr(response_cache, 'enabled', True)
+    client.get('/authors/')
+    client.get('/authors/')
+
+    text = client.get('/metrics').text
+
+    assert (
+        sample_line(text, f'{COUNT}{{{GET},route="/authors/",status="200"}}')
+        == expected_requests
+    )
+    assert 'route="unmatched"' not in text
+
+
+def test_pool_and_password_metrics(client, enabled, token):
+    text = client.get('/metrics').text
+
+    assert sample_line(text, 'madr_password_hash_duration_seconds_count')
+    assert 'madr_db_pool_checkout_wait_seconds_count{pool="primary"}' in text
+    assert 'madr_db_pool_checked_out{pool="primary"}' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    text = render(
+        merge([
+            [family('h', 'histogram', 'ajuda', [({}, histogram.sample())],
+                    buckets=(0.1, 1.0))]
+        ])
+    )  # fmt: skip
+
+    assert text.splitlines()[2:] == [
+        'h_bucket{le="0.1"} 2',
+        'h_bucket{le="1.0"} 3',
+        'h_bucket{le="+Inf"} 4',
+        'h_sum 3.65',
+        'h_count 4',
+    ]
+
+
+def test_workers_are_summed_and_dead_gauges_dropped(tmp_path):
+    expected_requests, expected_in_flight = 3, 2
+    dead = subprocess.run(
+        [sys.executable, '-c', 'import os; print(os.getpid())'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for pid in (int(dead.stdout), os.getppid()):
+        snapshot = Metrics(directory=str(tmp_path))
+        snapshot.in_flight = expected_in_flight
+        snapshot.observe_request('GET', '/books/', 200, 0.01)
+        (tmp_path / f'metrics-{pid}.json').write_text(
+            json.dumps(snapshot.collect())
+        )
+
+    local = Metrics(directory=str(tmp_path))
+    local.observe_request('GET', '/books/', 200, 0.01)
+    local.write()
+
+    # A segunda leitura já encontra o worker encerrado no agregado
+    for _ in range(2):
+        text = render(merge([local.collect(), *local.read_others()]))
+
+        assert (
+            sample_line(text, f'{COUNT}{{{GET},route="/books/",status="200"}}')
+            == expected_requests
+        )
+        # Só o gauge do processo vivo (o pai) entra na soma
+        assert sample_line(text, 'madr_http_requests_in_flight') == (
+            expected_in_flight
+        )
+
+    assert sorted(path.name for path in tmp_path.glob('*.json')) == sorted([
+        f'metrics-{os.getpid()}.json',
+        f'metrics-{os.getppid()}.json',
+        'metrics-retired.json',
+    ])
+
+
+def test_stale_and_reused_pid_snapshots(tmp_path):
+    expected_requests = 2
+    previous = Metrics(directory=str(tmp_path))
+    previous.in_flight = 1
+    previous.observe_request('GET', '/books/', 200, 0.01)
+    for pid in (os.getpid(), os.getppid()):
+        (tmp_path / f'metrics-{pid}.json').write_text(
+            json.dumps(previous.collect())
+        )
+    # O arquivo do pai não é atualizado há muito tempo
+    os.utime(tmp_path / f'metrics-{os.getppid()}.json', (0, 0))
+
+    local = Metrics(directory=str(tmp_path))
+    # Ao subir, o worker soma o arquivo deixado por outro com o mesmo PID
+    local.retire(os.getpid())
+    text = render(merge([local.collect(), *local.read_others()]))
+
+    assert sample_line(text, COUNT) == expected_requests
+    assert sample_line(text, 'madr_http_requests_in_flight') == 0
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from madr.passwords import PasswordPool, password_pool
+
+
+def test_password_pool_hash_and_verify():
+    expected_completed = 2
+    pool = PasswordPool(workers=1, queue_size=0)
+
+    async def hash_and_verify():
+        hashed = await pool.hash('secret')
+        return await pool.verify('secret', hashed)
+
+    assert asyncio.run(hash_and_verify())
+    assert pool.stats()['completed'] == expected_completed
+    pool.shutdown()
+
+
+def test_password_pool_rejects_when_full():
+    pool = PasswordPool(workers=1, queue_size=0)
+    release = threading.Event()
+
+    async def saturate():
+        busy = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as exc:
+            await pool.hash('secret')
+
+        release.set()
+        await busy
+        return exc.value
+
+    exc = asyncio.run(saturate())
+
+    assert exc.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert pool.stats()['rejected'] == 1
+    pool.shutdown()
+
+
+def test_get_token_returns_503_when_pool_is_full(client, user, monkeypatch):
+    monkeypatch.setattr(password_pool, 'limit', 0)
+
+    data = {'username': user.email, 'password': user.clean_password}
+    response = client.post('/auth/token', data=data)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['retry-after'] == '1'
+
+
+def test_password_stats(client, admin_token):
+    response = client.get(
+        '/internal/passwords',
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['completed'] >= 1
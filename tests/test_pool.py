@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+from sqlalchemy import create_engine, text
+
+from madr.pool import PoolStats, TimedQueuePool
+
+
+def test_pool_stats_tracks_checkouts(engine):
+    expected_connections = 2
+    pool_engine = create_engine(
+        engine.url, poolclass=TimedQueuePool, pool_size=1, max_overflow=1
+    )
+    stats = PoolStats(pool_engine)
+
+    with pool_engine.connect() as first, pool_engine.connect() as second:
+        first.execute(text('SELECT 1'))
+        second.execute(text('SELECT 1'))
+        snapshot = stats.snapshot()
+
+        assert snapshot['checked_out'] == expected_connections
+        assert snapshot['overflow'] == 1
+
+    snapshot = stats.snapshot()
+    pool_engine.dispose()
+
+    assert snapshot['checked_out'] == 0
+    assert snapshot['idle'] == 1
+    assert snapshot['checkouts'] == expected_connections
+    assert snapshot['wait_seconds_sum'] >= 0
+
+
+def test_database_pool_stats(client, admin_token):
+    response = client.get(
+        '/internal/pool', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'checked_out' in response.json()['primary']
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+
+from madr.response_cache import response_cache
+from tests.conftest import AuthorFactory
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(response_cache, 'enabled', True)
+
+
+def test_repeated_get_is_served_from_cache(client, author, statements):
+    first = client.get('/authors/?limit=5&name=test')
+    statements.clear()
+    second = client.get('/authors/?name=test&limit=5')
+
+    assert second.json() == first.json()
+    assert second.headers['etag'] == first.headers['etag']
+    assert second.headers['etag'].startswith('W/"')
+    assert second.headers['cache-control'] == 'no-cache'
+    assert statements == []
+    assert response_cache.stats()['hits'] == 1
+
+
+def test_if_none_match_returns_not_modified(client, author):
+    etag = client.get(f'/authors/{author.id}').headers['etag']
+
+    response = client.get(
+        f'/authors/{author.id}', headers={'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+
+def test_stale_etag_returns_full_response(client, author):
+    response = client.get(
+        f'/authors/{author.id}', headers={'If-None-Match': 'W/"outro"'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_writes_invalidate_cached_responses(client, token, author):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/authors/').headers['etag']
+
+    client.post('/authors/', headers=headers, json={'name': 'novo autor'})
+    response = client.get('/authors/', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert {'name': 'novo autor'} in response.json()['authors']
+
+
+def test_author_writes_invalidate_embedded_books(client, token, author):
+    headers = {'Authorization': f'Bearer {token}'}
+    book = {'title': 'livro', 'year': 1900, 'author_id': author.id}
+    client.post('/books/', headers=headers, json=book)
+    client.get('/books/?include=author')
+
+    client.patch(
+        f'/authors/{author.id}', headers=headers, json={'name': 'renomeado'}
+    )
+    response = client.get('/books/?include=author')
+
+    assert response.json()['books'][0]['author']['name'] == 'renomeado'
+
+
+def test_errors_are_not_cached(client, session):
+    client.get('/authors/1')
+    session.add(AuthorFactory())
+    session.commit()
+
+    assert client.get('/authors/1').status_code == HTTPStatus.OK
+
+
+def test_large_bodies_are_not_stored(client, session, monkeypatch):
+    monkeypatch.setattr(response_cache, 'max_body_bytes', 100)
+    session.add_all(AuthorFactory.create_batch(20))
+    session.commit()
+
+    first = client.get('/authors/')
+    second = client.get('/authors/')
+
+    assert second.headers['etag'] == first.headers['etag']
+    assert response_cache.stats()['hits'] == 0
+    assert response_cache.stats()['too_large'] == len([first, second])
+
+
+def test_disabled_cache_sends_no_etag(client, monkeypatch):
+    monkeypatch.setattr(response_cache, 'enabled', False)
+
+    assert 'etag' not in client.get('/authors/').headers
+
+
+def test_hit_ratio_is_exposed(client, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    expected_hit_ratio = 0.5
+    client.get('/users/')
+    client.get('/users/')
+
+    response = client.get('/internal/cache', headers=headers)
+
+    assert response.json()['responses']['hit_ratio'] == expected_hit_ratio
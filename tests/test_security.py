@@ -1,8 +1,18 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
+from freezegun import freeze_time
 from jwt import decode
 
-from madr.security import create_access_token, settings
+from madr.security import (
+    create_access_token,
+    get_current_user,
+    invalidate_user_cache,
+    settings,
+    token_digest,
+    user_cache,
+)
 
 
 def test_jwt():
@@ -46,3 +56,105 @@ def test_jwt_invalid_token_not_user_send(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_uses_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.post('/auth/refresh_token', headers=headers)
+    client.post('/auth/refresh_token', headers=headers)
+
+    assert user_cache.hits == 1
+    assert user_cache.misses == 1
+
+
+def test_user_cache_does_not_store_password_hash(client, user, token):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    cached = asyncio.run(user_cache.get(token_digest(token)))
+
+    assert cached['id'] == user.id
+    assert 'password' not in cached
+
+
+def test_user_invalidated_during_lookup_is_not_cached(user, token):
+    class RacingSession:
+        @staticmethod
+        async def scalar(query):
+            # Outra requisição altera o usuário e invalida o cache enquanto
+            # este SELECT ainda não voltou
+            await invalidate_user_cache(user.id)
+            return user
+
+    async def scenario():
+        await get_current_user(session=RacingSession(), token=token)
+        return await user_cache.get(token_digest(token))
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_cache_stats(client, admin_token):
+    response = client.get(
+        '/internal/cache', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['users']['misses'] == 1
+
+
+def test_update_user_invalidates_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cache(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    client.delete(f'/users/{user.id}', headers=headers)
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_cached_token_expires_with_jwt(client, user):
+    with freeze_time('2023-07-14 12:00:00'):
+        response = client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': user.clean_password},
+        )
+        token = response.json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = client.post('/auth/refresh_token', headers=headers)
+        assert response.status_code == HTTPStatus.OK
+
+    with freeze_time('2023-07-14 12:31:00'):
+        response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize('path', ['/internal/cache', '/internal/pool'])
+def test_internal_stats_require_admin(client, token, path):
+    response = client.get(path, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Not enough permissions'}
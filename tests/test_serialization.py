@@ -0,0 +1,60 @@
+import pytest
+
+from madr.schemas import BookWithAuthor
+from madr.serialization import FastJSONResponse, dump_rows
+from tests.conftest import BookFactory
+
+PATHS = [
+    '/books/?include=author&total=exact',
+    '/books/?limit=2',
+    '/authors/?total=exact',
+    '/users/',
+]
+
+
+@pytest.fixture
+def catalog(session, author, user):
+    session.add_all(BookFactory.create_batch(3, author_id=author.id))
+    session.commit()
+
+
+def fast_json(monkeypatch, enabled):
+    for router in ('livros', 'autores', 'contas'):
+        monkeypatch.setattr(
+            f'madr.routers.{router}.settings.FAST_JSON_ENABLED', enabled
+        )
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_fast_path_matches_validated_response(
+    client, catalog, monkeypatch, path
+):
+    validated = client.get(path)
+    fast_json(monkeypatch, enabled=True)
+    fast = client.get(path)
+
+    assert fast.content == validated.content
+    assert fast.headers.get('x-total-count') == validated.headers.get(
+        'x-total-count'
+    )
+
+
+def test_dump_rows_reads_nested_schemas(session, author):
+    book = BookFactory(author_id=author.id)
+    session.add(book)
+    session.commit()
+
+    assert dump_rows(BookWithAuthor, [book]) == [
+        {
+            'title': book.title,
+            'year': book.year,
+            'author_id': author.id,
+            'author': {'id': author.id, 'name': author.name},
+        }
+    ]
+
+
+def test_fast_json_response_renders_compact_utf8():
+    response = FastJSONResponse({'name': 'joão', 'ids': [1, 2]})
+
+    assert response.body == '{"name":"joão","ids":[1,2]}'.encode()
@@ -0,0 +1,163 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import httpx
+import pytest
+import uvicorn
+
+from madr import serve
+from tests.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def redis_url(monkeypatch):
+    monkeypatch.setattr(
+        serve.settings, 'CACHE_REDIS_URL', 'redis://localhost:6379/0'
+    )
+
+
+def test_server_options_use_settings(monkeypatch, redis_url):
+    monkeypatch.setattr(serve.settings, 'SERVER_WORKERS', 3)
+    monkeypatch.setattr(serve.settings, 'SERVER_MAX_REQUESTS', 1000)
+    monkeypatch.setattr(serve.settings, 'SERVER_LIMIT_CONCURRENCY', 200)
+
+    options = serve.server_options()
+
+    assert options['workers'] == 3  # noqa: PLR2004
+    assert options['limit_max_requests'] == 1000  # noqa: PLR2004
+    assert options['limit_concurrency'] == 200  # noqa: PLR2004
+    assert options['loop'] == 'uvloop'
+    assert options['http'] == 'httptools'
+
+
+def test_workers_default_to_cpu_count(monkeypatch, redis_url):
+    monkeypatch.setattr(serve.settings, 'SERVER_WORKERS', None)
+
+    assert serve.server_options()['workers'] == serve.cpu_count()
+
+
+def test_cli_overrides_settings(redis_url):
+    options = serve.server_options(host='127.0.0.1', port=9000, workers=None)
+
+    assert options['host'] == '127.0.0.1'
+    assert options['port'] == 9000  # noqa: PLR2004
+    assert options['workers'] == serve.cpu_count()
+
+
+def test_options_are_accepted_by_uvicorn():
+    config = uvicorn.Config('madr.app:app', **serve.server_options())
+
+    assert (
+        config.timeout_keep_alive == serve.settings.SERVER_KEEP_ALIVE_SECONDS
+    )
+
+
+def test_several_workers_require_redis(monkeypatch):
+    monkeypatch.setattr(serve.settings, 'CACHE_REDIS_URL', None)
+    monkeypatch.setattr(serve.settings, 'SERVER_WORKERS', None)
+    monkeypatch.setattr(serve, 'cpu_count', lambda: 4)
+
+    assert serve.server_options()['workers'] == 1
+
+    with pytest.raises(SystemExit):
+        serve.server_options(workers=2)
+
+
+def test_single_worker_is_not_recycled(monkeypatch):
+    monkeypatch.setattr(serve.settings, 'CACHE_REDIS_URL', None)
+    monkeypatch.setattr(serve.settings, 'SERVER_MAX_REQUESTS', 1000)
+
+    options = serve.server_options(workers=1)
+
+    assert options['workers'] == 1
+    assert options['limit_max_requests'] is None
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _serve(engine, workers, env):
+    """Sobe `python -m madr.serve` e espera responder."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'madr.serve', '--workers', str(workers),
+         '--host', '127.0.0.1', '--port', str(port)],
+        env={
+            **os.environ,
+            'DATABASE_URL': engine.url.render_as_string(hide_password=False),
+            'SERVER_ACCESS_LOG': 'false',
+            **env,
+        },
+    )  # fmt: skip
+    url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(f'{url}/docs')
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+
+        yield url, process
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def test_single_worker_keeps_serving_past_max_requests(engine, session):
+    requests = 5
+
+    with _serve(engine, 1, {'SERVER_MAX_REQUESTS': '2'}) as (url, process):
+        statuses = [
+            httpx.get(f'{url}/stats/').status_code for _ in range(requests)
+        ]
+
+        assert process.poll() is None
+
+    assert statuses == [HTTPStatus.OK] * requests
+
+
+def test_deleted_user_is_rejected_by_every_worker(engine, user):
+    attempts = 20
+
+    with (
+        FakeRedis() as redis,
+        _serve(
+            engine,
+            2,
+            {'CACHE_BACKEND': 'memory', 'CACHE_REDIS_URL': redis.url},
+        ) as (url, _),
+    ):
+        token = httpx.post(
+            f'{url}/auth/token',
+            data={'username': user.email, 'password': user.clean_password},
+        ).json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        # Conexões novas se espalham entre os workers e aquecem o cache de
+        # usuários de cada um
+        for _ in range(attempts):
+            httpx.post(f'{url}/auth/refresh_token', headers=headers)
+
+        response = httpx.delete(f'{url}/users/{user.id}', headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        time.sleep(0.5)
+
+        statuses = {
+            httpx.post(
+                f'{url}/auth/refresh_token', headers=headers
+            ).status_code
+            for _ in range(attempts)
+        }
+
+    assert statuses == {HTTPStatus.UNAUTHORIZED}